@@ -1,13 +1,13 @@
+import importlib.util
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from streamlit_option_menu import option_menu
-import json
-from datetime import datetime
-import numpy as np
-from streamlit_extras.metric_cards import style_metric_cards
-from streamlit_extras.colored_header import colored_header
+
+from src.rag.startup import ModelPreloader, profiler
+
+# Heavy libraries (pandas, numpy, plotly, streamlit_extras) are imported by the
+# pages that use them via profiler.import_module, so a cold replica only pays for
+# what the first page renders and the startup report can attribute the cost.
 
 # Page configuration
 st.set_page_config(
@@ -132,6 +132,15 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_model_preloader():
+    """Start loading the embedding model in the background, once per process"""
+    if importlib.util.find_spec('sentence_transformers') is None:
+        return None
+    return ModelPreloader()
+
+get_model_preloader()
+
 # Initialize session state
 if 'selected_career' not in st.session_state:
     st.session_state.selected_career = None
@@ -233,6 +242,8 @@ if selected == "Home":
     
     # Trending careers section
     st.markdown("### 📈 Trending Careers in Singapore")
+    pd = profiler.import_module('pandas')
+    px = profiler.import_module('plotly.express')
     
     # Sample data for trending careers
     trending_data = pd.DataFrame({
@@ -250,6 +261,7 @@ if selected == "Home":
     st.plotly_chart(fig, use_container_width=True)
 
 elif selected == "Career Explorer":
+    colored_header = profiler.import_module('streamlit_extras.colored_header').colored_header
     colored_header(
         label="Career Explorer",
         description="Discover career opportunities across industries",
@@ -318,6 +330,7 @@ elif selected == "Career Explorer":
                 """, unsafe_allow_html=True)
 
 elif selected == "Skills Assessment":
+    colored_header = profiler.import_module('streamlit_extras.colored_header').colored_header
     colored_header(
         label="Skills Assessment",
         description="Evaluate your skills and identify growth areas",
@@ -344,6 +357,8 @@ elif selected == "Skills Assessment":
                 if skills_input:
                     # Simulated skill analysis
                     st.markdown("### 📊 Skills Analysis Results")
+                    np = profiler.import_module('numpy')
+                    go = profiler.import_module('plotly.graph_objects')
                     
                     skills = [s.strip() for s in skills_input.split(',')]
                     skill_levels = np.random.randint(60, 95, size=len(skills))
@@ -387,6 +402,11 @@ elif selected == "Skills Assessment":
                         """, unsafe_allow_html=True)
 
 elif selected == "Market Insights":
+    colored_header = profiler.import_module('streamlit_extras.colored_header').colored_header
+    style_metric_cards = profiler.import_module('streamlit_extras.metric_cards').style_metric_cards
+    pd = profiler.import_module('pandas')
+    px = profiler.import_module('plotly.express')
+    go = profiler.import_module('plotly.graph_objects')
     colored_header(
         label="Market Insights",
         description="Real-time job market trends and analytics",
@@ -458,6 +478,7 @@ elif selected == "Market Insights":
         st.plotly_chart(fig, use_container_width=True)
 
 elif selected == "Learning Hub":
+    colored_header = profiler.import_module('streamlit_extras.colored_header').colored_header
     colored_header(
         label="Learning Hub",
         description="Curated learning resources for career development",
@@ -562,6 +583,7 @@ elif selected == "Learning Hub":
     
     with tab4:
         st.markdown("#### Industry Certifications")
+        pd = profiler.import_module('pandas')
         certs = pd.DataFrame({
             'Certification': ['AWS Solutions Architect', 'Google Cloud Professional', 'Microsoft Azure Admin', 'Certified Kubernetes Admin'],
             'Difficulty': ['Intermediate', 'Advanced', 'Intermediate', 'Advanced'],
@@ -570,6 +592,7 @@ elif selected == "Learning Hub":
         st.dataframe(certs, use_container_width=True)
 
 elif selected == "AI Assistant":
+    colored_header = profiler.import_module('streamlit_extras.colored_header').colored_header
     colored_header(
         label="AI Career Assistant",
         description="Get personalized career guidance powered by AI",
@@ -579,21 +602,31 @@ elif selected == "AI Assistant":
     # Chat interface
     st.markdown("### 💬 Chat with Your AI Career Coach")
     
-    # Initialize chat history
-    if "messages" not in st.session_state:
-        st.session_state.messages = [
-            {"role": "assistant", "content": "Hello! I'm your AI Career Assistant. I can help you with career planning, skill development, job search strategies, and more. What would you like to explore today?"}
-        ]
+    # Conversation state keeps recent messages and folds older turns into a summary
+    ConversationState = profiler.import_module('src.rag.conversation_state').ConversationState
+    if "conversation" not in st.session_state:
+        st.session_state.conversation = ConversationState()
+        st.session_state.conversation.add_message(
+            "assistant",
+            "Hello! I'm your AI Career Assistant. I can help you with career planning, skill development, job search strategies, and more. What would you like to explore today?"
+        )
+    conversation = st.session_state.conversation
+    
+    # Older turns collapse into one expander instead of being re-rendered
+    if conversation.summary:
+        with st.expander(f"Earlier in this conversation ({conversation.compacted} messages)"):
+            for question in conversation.summary:
+                st.markdown(f"- {question}")
     
     # Display chat messages
-    for message in st.session_state.messages:
+    for message in conversation.messages:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
     
     # Chat input
     if prompt := st.chat_input("Ask me anything about your career..."):
         # Add user message to chat history
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        conversation.add_message("user", prompt)
         
         # Display user message
         with st.chat_message("user"):
@@ -612,7 +645,7 @@ I understand you're interested in exploring this topic. Let me provide you with
 Would you like me to elaborate on any specific aspect?"""
             
             st.markdown(response)
-            st.session_state.messages.append({"role": "assistant", "content": response})
+            conversation.add_message("assistant", response)
     
     # Quick action buttons
     st.markdown("### 🚀 Quick Actions")
@@ -641,3 +674,6 @@ st.markdown("""
     <p>© 2024 SG Career Atlas | Empowering careers in Singapore 🇸🇬</p>
 </div>
 """, unsafe_allow_html=True)
+
+# Logged again by ModelPreloader once the model has loaded
+profiler.log_report_once('first render')
@@ -0,0 +1,162 @@
+"""
+Throughput benchmark for the headless retrieval API.
+
+Starts ``src.rag.api_server`` in a subprocess once with micro-batching
+disabled (``--max-batch-size 1``) and once enabled, then drives
+``/search`` from closed-loop keep-alive clients at each concurrency
+level. Reports queries/second, latency percentiles and, on Linux, the
+server's CPU seconds per query.
+
+Usage (from the repository root):
+
+    python -m benchmarks.api_benchmark --concurrency 1,8,32 --duration 10
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from benchmarks.retrieval_benchmark import latency_summary, load_example_queries
+
+
+@contextmanager
+def api_process(args, max_batch_size: int) -> Iterator[tuple]:
+    """Run the API server in its own interpreter; yields (port, pid)"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    command = [
+        sys.executable, '-m', 'src.rag.api_server', '--port', str(port),
+        '--data-dir', args.data_dir, '--embedder', args.embedder,
+        '--max-batch-size', str(max_batch_size), '--max-wait-ms', str(args.max_wait_ms),
+        '--no-monitoring'  # no per-request tracing in the measured path
+    ]
+    proc = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    try:
+        proc.stdout.readline()  # "Serving N documents on ..."
+        # Keep draining so stray output can never fill the pipe and block the server
+        threading.Thread(target=proc.stdout.read, daemon=True).start()
+        yield port, proc.pid
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def process_cpu_seconds(pid: int) -> Optional[float]:
+    """User + system CPU time of ``pid`` from /proc, or None off Linux"""
+    try:
+        with open(f"/proc/{pid}/stat", 'r') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+def run_client(port: int, queries: List[str], offset: int, stop_at: float, top_k: int,
+               latencies: List[float], errors: List[str], lock: threading.Lock):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    i = offset
+    try:
+        while time.perf_counter() < stop_at:
+            body = json.dumps({'query': queries[i % len(queries)], 'top_k': top_k}).encode('utf-8')
+            start = time.perf_counter()
+            connection.request('POST', '/search', body, {'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            response.read()
+            elapsed = time.perf_counter() - start
+            with lock:
+                if response.status == 200:
+                    latencies.append(elapsed)
+                else:
+                    errors.append(str(response.status))
+            i += 1
+    finally:
+        connection.close()
+
+
+def run_level(port: int, pid: int, queries: List[str], concurrency: int, duration: float,
+              top_k: int) -> Dict:
+    latencies: List[float] = []
+    errors: List[str] = []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+    clients = [
+        threading.Thread(target=run_client, args=(port, queries, i * 7, stop_at, top_k,
+                                                  latencies, errors, lock))
+        for i in range(concurrency)
+    ]
+
+    cpu_start, wall_start = process_cpu_seconds(pid), time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    cpu_end, wall = process_cpu_seconds(pid), time.perf_counter() - wall_start
+
+    level = {
+        'concurrency': concurrency,
+        'completed': len(latencies),
+        'errors': len(errors),
+        'throughput_qps': len(latencies) / wall
+    }
+    if latencies:
+        level['latency_ms'] = latency_summary(latencies)
+    if cpu_start is not None and latencies:
+        level['server_cpu_ms_per_query'] = (cpu_end - cpu_start) * 1000 / len(latencies)
+    return level
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval API throughput with and without micro-batching")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--embedder', choices=['hashing', 'model'], default='hashing')
+    parser.add_argument('--concurrency', default='1,8,32')
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds per level")
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    queries = load_example_queries()
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'embedder': args.embedder,
+            'max_wait_ms': args.max_wait_ms,
+            'cpu_count': os.cpu_count()
+        },
+        'runs': {}
+    }
+    for label, batch_size in (('unbatched', 1), ('micro_batched', args.max_batch_size)):
+        with api_process(args, batch_size) as (port, pid):
+            levels = []
+            for concurrency in (int(c) for c in args.concurrency.split(',')):
+                level = run_level(port, pid, queries, concurrency, args.duration, args.top_k)
+                levels.append(level)
+                latency = level.get('latency_ms', {})
+                print(f"  {label:<14} c={concurrency:<3} {level['throughput_qps']:9.1f} q/s  "
+                      f"p50 {latency.get('p50', 0):8.2f}  p99 {latency.get('p99', 0):8.2f} ms  "
+                      f"cpu/query {level.get('server_cpu_ms_per_query', float('nan')):6.2f} ms", flush=True)
+            results['runs'][label] = levels
+
+    output = args.output or os.path.join(
+        'benchmarks', 'results', f"api-{args.embedder}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""
+Concurrent-session load test for the AI Assistant flow.
+
+Simulates N Streamlit sessions as threads in one process (as Streamlit
+runs them) calling ``process_user_query`` with exponential think time
+and a weighted query mix. The LLM is a local stub server with
+configurable latency, streaming and upstream concurrency limit. The
+concurrency is stepped up, and throughput, latency percentiles, queueing
+delay and CPU use are reported for each level, along with the
+saturation point.
+
+Usage (from the repository root):
+
+    python -m benchmarks.load_test --concurrency 1,2,4,8,16 --duration 15
+    python -m benchmarks.load_test --target src.rag:RAGService  # once it exists
+"""
+
+import argparse
+import importlib
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+
+from benchmarks.retrieval_benchmark import latency_summary, load_config, load_corpus, load_example_queries
+from src.rag.dense_index import DenseIndex
+from src.rag.document_store import DocumentStore
+from src.rag.fusion import reciprocal_rank_fusion
+from src.rag.hashing_embedder import HashingEmbedder
+from src.rag.indexes import KeywordIndex
+from src.rag.llm_client import LLMClient
+from src.rag.stub_llm import StubLLMServer
+
+# Follow-up chips offered by RAGService._generate_suggestions
+FOLLOW_UP_QUERIES = [
+    "What skills do I need for this role?",
+    "Show me the career progression path",
+    "Where can I learn these skills?",
+    "Which jobs require these skills?"
+]
+
+SYSTEM_PROMPT = "You are an AI career advisor for Singapore professionals."
+
+
+class LocalRAGPipeline:
+    """Retrieval over data/ plus one completion call per query, shared by all sessions
+
+    Mirrors the planned RAGService: one shared embedder and index, hybrid
+    retrieval, a context of at most ``max_context_length`` characters,
+    and a chat completion through the shared pooled ``LLMClient``. With
+    ``pooled=False`` each completion opens a fresh connection instead, as
+    the per-call OpenAI SDK path did.
+    """
+
+    def __init__(self, llm_url: str, data_dir: str = 'data', limit: Optional[int] = None,
+                 embedder=None, top_k: int = 10, stream: bool = False,
+                 max_context_length: int = 2000, model: str = 'gpt-3.5-turbo',
+                 pooled: bool = True, llm_concurrency: int = 8):
+        self.llm_url = llm_url
+        self.embedder = embedder or HashingEmbedder()
+        self.top_k = top_k
+        self.stream = stream
+        self.max_context_length = max_context_length
+        self.model = model
+        self.llm_client = LLMClient(llm_url, api_key='stub', model=model, max_connections=llm_concurrency,
+                                    max_concurrency=llm_concurrency) if pooled else None
+
+        documents = load_corpus(data_dir, limit)
+        self.documents = DocumentStore(documents)
+        vectors = self.embedder.encode([doc['content'] for doc in documents])
+        self.dense_index = DenseIndex([doc['id'] for doc in documents], vectors)
+        self.keyword_index = KeywordIndex()
+        self.keyword_index.upsert(documents)
+
+    def process_user_query(self, query: str) -> Dict:
+        start = time.perf_counter()
+        query_vector = self.embedder.encode([query])[0]
+        semantic = self.dense_index.search(query_vector, self.top_k)
+        keyword = self.keyword_index.search(query, self.top_k)
+        retrieved = reciprocal_rank_fusion([semantic, keyword], [0.7, 0.3], top_k=self.top_k)
+        context = "\n\n".join(self.documents.content(r['id']) for r in retrieved)
+        context = f"User Query: {query}\n\nRelevant Information:\n{context}"[:self.max_context_length]
+        retrieval_seconds = time.perf_counter() - start
+
+        messages = [
+            {'role': 'system', 'content': SYSTEM_PROMPT},
+            {'role': 'user', 'content': context}
+        ]
+        if self.llm_client is not None:
+            completion = self.llm_client.chat(messages, stream=self.stream, temperature=0.7, max_tokens=500)
+        else:
+            completion = self._complete_unpooled(messages)
+        return {
+            'response': completion['content'],
+            'sources': [self.documents[r['id']] for r in retrieved[:3]],
+            'timings': {
+                'retrieval': retrieval_seconds,
+                'llm_time_to_first_token': completion['time_to_first_token'],
+                'llm_total': completion['latency'],
+                'llm_client_queue': completion.get('queue_seconds', 0.0),
+                'upstream_queue': completion['upstream_queue_seconds']
+            }
+        }
+
+    def _complete_unpooled(self, messages: List[Dict]) -> Dict:
+        payload = json.dumps({
+            'model': self.model,
+            'messages': messages,
+            'temperature': 0.7,
+            'max_tokens': 500,
+            'stream': self.stream
+        }).encode('utf-8')
+        request = urllib.request.Request(
+            f"{self.llm_url}/chat/completions", data=payload,
+            headers={'Content-Type': 'application/json', 'Authorization': 'Bearer stub'}
+        )
+
+        start = time.perf_counter()
+        first_token = None
+        with urllib.request.urlopen(request, timeout=60) as response:
+            queue_ms = float(response.headers.get('X-Queue-Time-Ms', 0.0))
+            if self.stream:
+                parts = []
+                for line in response:
+                    if not line.startswith(b'data: ') or line.strip() == b'data: [DONE]':
+                        continue
+                    if first_token is None:
+                        first_token = time.perf_counter() - start
+                    parts.append(json.loads(line[6:])['choices'][0]['delta'].get('content', ''))
+                content = ''.join(parts)
+            else:
+                content = json.loads(response.read())['choices'][0]['message']['content']
+        total = time.perf_counter() - start
+        return {
+            'content': content,
+            'time_to_first_token': first_token if first_token is not None else total,
+            'latency': total,
+            'upstream_queue_seconds': queue_ms / 1000
+        }
+
+
+@contextmanager
+def stub_process(args) -> Iterator[str]:
+    """Run the stub LLM in its own interpreter so it does not share our GIL"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    proc = subprocess.Popen([
+        sys.executable, '-m', 'src.rag.stub_llm', '--port', str(port),
+        '--first-token-ms', str(args.first_token_ms), '--token-ms', str(args.token_ms),
+        '--completion-tokens', str(args.completion_tokens),
+        '--max-concurrency', str(args.upstream_concurrency), '--seed', str(args.seed)
+    ], stdout=subprocess.PIPE, text=True)
+    try:
+        proc.stdout.readline()  # "Stub LLM listening on ..."
+        yield f"http://127.0.0.1:{port}/v1"
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+@contextmanager
+def stub_thread(args) -> Iterator[str]:
+    """Run the stub LLM on a thread of this process"""
+    with StubLLMServer(first_token_ms=args.first_token_ms, token_ms=args.token_ms,
+                       completion_tokens=args.completion_tokens,
+                       max_concurrency=args.upstream_concurrency, seed=args.seed) as stub:
+        yield stub.url
+
+
+def fetch_stub_stats(llm_url: str) -> Dict:
+    with urllib.request.urlopen(f"{llm_url}/stats", timeout=5) as response:
+        return json.loads(response.read())
+
+
+def load_target(spec: str, llm_url: str, args, config: Optional[Dict] = None) -> tuple:
+    """Build the object under test and the LLMClient it uses
+
+    ``spec`` is ``local`` or a ``module:factory`` spec. A factory is
+    called with ``llm_client=``, a client built from the config's ``llm``
+    section with its ``base_url`` pointed at the stub.
+    """
+    config = config or {}
+    if spec == 'local':
+        embedder = None
+        if args.embedder == 'model':
+            from src.rag.embedding_engine import CPUEmbeddingEngine
+            # Sessions are threads of this process, as under Streamlit
+            embedder = CPUEmbeddingEngine.from_config(config.get('embedding', {}), num_workers=1)
+        target = LocalRAGPipeline(llm_url, args.data_dir, args.limit, embedder, stream=args.stream,
+                                  pooled=not args.unpooled_llm, llm_concurrency=args.llm_concurrency)
+        return target, target.llm_client
+
+    llm_client = LLMClient.from_config(config.get('llm', {}), api_key='stub', base_url=llm_url)
+    module_name, _, attr = spec.partition(':')
+    factory: Callable = getattr(importlib.import_module(module_name), attr)
+    return factory(llm_client=llm_client), llm_client
+
+
+def run_session(target, stop_at: float, think_seconds: float, queries: List[str],
+                weights: List[float], rng: random.Random, records: List[Dict], lock: threading.Lock):
+    while True:
+        if think_seconds:
+            time.sleep(rng.expovariate(1 / think_seconds))
+        if time.perf_counter() >= stop_at:
+            return
+        query = rng.choices(queries, weights)[0]
+        start = time.perf_counter()
+        record = {'query': query}
+        try:
+            result = target.process_user_query(query)
+            record['timings'] = result.get('timings', {}) if isinstance(result, dict) else {}
+        except Exception as e:
+            record['error'] = repr(e)
+        record['latency'] = time.perf_counter() - start
+        with lock:
+            records.append(record)
+
+
+def run_level(target, concurrency: int, duration: float, think_seconds: float,
+              queries: List[str], weights: List[float], seed: int) -> Dict:
+    records: List[Dict] = []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+    sessions = [
+        threading.Thread(target=run_session, args=(target, stop_at, think_seconds, queries, weights,
+                                                   random.Random(seed + i), records, lock))
+        for i in range(concurrency)
+    ]
+
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    for session in sessions:
+        session.start()
+    for session in sessions:
+        session.join()
+    wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+
+    completed = [r for r in records if 'error' not in r]
+    level = {
+        'concurrency': concurrency,
+        'completed': len(completed),
+        'errors': len(records) - len(completed),
+        'throughput_qps': len(completed) / wall,
+        'cpu_utilisation': cpu / wall / (os.cpu_count() or 1)
+    }
+    if completed:
+        level['latency_ms'] = latency_summary([r['latency'] for r in completed])
+        for stage in ('retrieval', 'llm_time_to_first_token', 'llm_total', 'llm_client_queue', 'upstream_queue'):
+            samples = [r['timings'][stage] for r in completed if stage in r['timings']]
+            if samples:
+                level[f"{stage}_ms"] = latency_summary(samples)
+    return level
+
+
+def find_saturation(levels: List[Dict], threshold: float = 0.9) -> Optional[int]:
+    """Lowest concurrency reaching ``threshold`` of the peak throughput"""
+    if not levels:
+        return None
+    peak = max(level['throughput_qps'] for level in levels)
+    for level in levels:
+        if level['throughput_qps'] >= threshold * peak:
+            return level['concurrency']
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test with a stub LLM")
+    parser.add_argument('--target', default='local',
+                        help="'local' or module:factory; the factory is called with llm_client=")
+    parser.add_argument('--config', default='config/rag_config.yaml')
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--limit', type=int, default=None)
+    parser.add_argument('--embedder', choices=['hashing', 'model'], default='hashing')
+    parser.add_argument('--concurrency', default='1,2,4,8,16,32')
+    parser.add_argument('--duration', type=float, default=15.0, help="Seconds per level")
+    parser.add_argument('--think-ms', type=float, default=500.0, help="Mean think time")
+    parser.add_argument('--follow-up-weight', type=float, default=1.0,
+                        help="Weight of each follow-up chip relative to an example query")
+    parser.add_argument('--stream', action='store_true')
+    parser.add_argument('--first-token-ms', type=float, default=300.0)
+    parser.add_argument('--token-ms', type=float, default=10.0)
+    parser.add_argument('--completion-tokens', type=int, default=60)
+    parser.add_argument('--upstream-concurrency', type=int, default=0,
+                        help="Stub's concurrent request limit (0 = unlimited)")
+    parser.add_argument('--unpooled-llm', action='store_true',
+                        help="Open a fresh connection per completion instead of using LLMClient")
+    parser.add_argument('--llm-concurrency', type=int, default=8,
+                        help="LLMClient's cap on concurrent upstream calls")
+    parser.add_argument('--in-process-stub', action='store_true',
+                        help="Run the stub on a thread here instead of in a separate process")
+    parser.add_argument('--seed', type=int, default=13)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    queries = load_example_queries() + FOLLOW_UP_QUERIES
+    weights = [1.0] * (len(queries) - len(FOLLOW_UP_QUERIES)) + [args.follow_up_weight] * len(FOLLOW_UP_QUERIES)
+    levels = []
+
+    stub_context = stub_thread(args) if args.in_process_stub else stub_process(args)
+    with stub_context as llm_url:
+        target, llm_client = load_target(args.target, llm_url, args, load_config(args.config))
+        for concurrency in (int(c) for c in args.concurrency.split(',')):
+            level = run_level(target, concurrency, args.duration, args.think_ms / 1000,
+                              queries, weights, args.seed)
+            levels.append(level)
+            latency = level.get('latency_ms', {})
+            print(f"c={concurrency:<4} {level['throughput_qps']:8.2f} q/s  "
+                  f"p50 {latency.get('p50', float('nan')):8.1f}  p95 {latency.get('p95', float('nan')):8.1f}  "
+                  f"p99 {latency.get('p99', float('nan')):8.1f} ms  "
+                  f"cpu {level['cpu_utilisation']:5.1%}  errors {level['errors']}")
+        stub_stats = fetch_stub_stats(llm_url)
+
+    # Queueing delay: median latency above the single-session (unloaded) median
+    base = levels[0].get('latency_ms', {}).get('p50')
+    for level in levels:
+        if base is not None and 'latency_ms' in level:
+            level['queueing_delay_ms'] = max(level['latency_ms']['p50'] - base, 0.0)
+
+    saturation = find_saturation(levels)
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'target': args.target,
+            'embedder': args.embedder,
+            'duration': args.duration,
+            'think_ms': args.think_ms,
+            'stream': args.stream,
+            'first_token_ms': args.first_token_ms,
+            'token_ms': args.token_ms,
+            'upstream_concurrency': args.upstream_concurrency,
+            'pooled_llm': not args.unpooled_llm,
+            'cpu_count': os.cpu_count()
+        },
+        'levels': levels,
+        'saturation_concurrency': saturation,
+        'stub': stub_stats,
+        'llm_client': llm_client.stats if llm_client is not None else None
+    }
+    print(f"Saturation (90% of peak throughput) at concurrency {saturation}")
+    print(f"Upstream: {stub_stats['requests']} requests over {stub_stats['connections']} connections")
+    if llm_client is not None:
+        stats = llm_client.stats
+        print(f"LLM client: {stats['calls']} calls, {stats['shared']} shared via single-flight, "
+              f"{stats['retries']} retries, {stats['completion_tokens']} completion tokens")
+
+    output = args.output or os.path.join(
+        'benchmarks', 'results', f"load-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
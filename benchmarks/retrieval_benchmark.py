@@ -0,0 +1,288 @@
+"""
+Offline retrieval benchmark for SG Career Atlas.
+
+Builds the skills corpus from data/, indexes it with the deterministic
+hashing embedder (or the real model with ``--embedder model``) and runs
+the example queries from examples/rag_usage_example.py plus a seeded
+sample of title queries. Reports index build time, per-stage latency
+percentiles, queries/second, peak RSS and recall@k of the int8 index
+against exact brute force, and writes everything to JSON.
+
+Usage (from the repository root):
+
+    python -m benchmarks.retrieval_benchmark
+    python -m benchmarks.retrieval_benchmark --baseline benchmarks/results/<previous>.json
+"""
+
+import argparse
+import ast
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import yaml
+
+from src.rag.dense_index import DenseIndex, QuantizedDenseIndex, recall_at_k
+from src.rag.document_store import DocumentStore, memory_report
+from src.rag.fusion import reciprocal_rank_fusion
+from src.rag.hashing_embedder import HashingEmbedder
+from src.rag.index_refresh import iter_source_rows, row_to_document
+from src.rag.indexes import KeywordIndex
+
+EXAMPLES_PATH = os.path.join('examples', 'rag_usage_example.py')
+
+
+def load_example_queries(path: str = EXAMPLES_PATH) -> List[str]:
+    """Read ``example_queries`` from the example script without importing it"""
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+                getattr(target, 'id', None) == 'example_queries' for target in node.targets):
+            return ast.literal_eval(node.value)
+    raise ValueError(f"No example_queries list found in {path}")
+
+
+def load_corpus(data_dir: str, limit: Optional[int] = None) -> List[Dict]:
+    """Create skill documents from every source row in ``data_dir``"""
+    documents = []
+    for doc_id, source, row in iter_source_rows(data_dir):
+        documents.append(row_to_document(doc_id, source, row))
+        if limit and len(documents) >= limit:
+            break
+    return documents
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    """Percentiles of a list of durations in seconds, reported in milliseconds"""
+    values = np.asarray(samples) * 1000
+    return {
+        'p50': float(np.percentile(values, 50)),
+        'p95': float(np.percentile(values, 95)),
+        'p99': float(np.percentile(values, 99)),
+        'mean': float(values.mean())
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 1024 / (1024 if sys.platform == 'darwin' else 1)
+
+
+def load_config(path: str) -> Dict:
+    """rag_config.yaml as a dict, or empty if it does not exist"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+def make_embedder(kind: str, workers: Optional[int], config: Optional[Dict] = None):
+    """The hashing embedder, or the config's embedding engine with ``workers`` if given"""
+    if kind == 'hashing':
+        return HashingEmbedder()
+    from src.rag.embedding_engine import CPUEmbeddingEngine
+    overrides = {'num_workers': workers} if workers is not None else {}
+    return CPUEmbeddingEngine.from_config((config or {}).get('embedding', {}), **overrides)
+
+
+def run_benchmark(args) -> Dict:
+    build = {}
+
+    start = time.perf_counter()
+    documents = load_corpus(args.data_dir, args.limit)
+    build['load_documents'] = time.perf_counter() - start
+
+    embedder = make_embedder(args.embedder, args.workers, load_config(args.config))
+    start = time.perf_counter()
+    vectors = embedder.encode([doc['content'] for doc in documents])
+    build['embed_documents'] = time.perf_counter() - start
+    ids = [doc['id'] for doc in documents]
+
+    start = time.perf_counter()
+    exact_index = DenseIndex(ids, vectors)
+    build['dense_index'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    int8_index = QuantizedDenseIndex(ids, vectors)
+    build['int8_index'] = time.perf_counter() - start
+    int8_rerank_index = QuantizedDenseIndex(ids, vectors, rerank=args.rerank)
+
+    start = time.perf_counter()
+    keyword_index = KeywordIndex()
+    keyword_index.upsert(documents)
+    build['keyword_index'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    store = DocumentStore(documents)
+    build['document_store'] = time.perf_counter() - start
+    document_memory = memory_report(documents, store)
+
+    rng = random.Random(args.seed)
+    queries = load_example_queries() + [
+        doc['title'] for doc in rng.sample(documents, min(args.sampled_queries, len(documents)))
+    ]
+
+    stages = {name: [] for name in ('embedding', 'semantic_search', 'semantic_search_int8',
+                                    'keyword_search', 'fusion', 'total')}
+    query_vectors = []
+    for repeat in range(args.repeat):
+        for query in queries:
+            begin = time.perf_counter()
+            query_vector = embedder.encode([query])[0]
+            t1 = time.perf_counter()
+            semantic = exact_index.search(query_vector, args.top_k)
+            t2 = time.perf_counter()
+            int8_index.search(query_vector, args.top_k)
+            t3 = time.perf_counter()
+            keyword = keyword_index.search(query, args.top_k)
+            t4 = time.perf_counter()
+            reciprocal_rank_fusion([semantic, keyword], [args.semantic_weight, 1 - args.semantic_weight],
+                                   top_k=args.top_k)
+            t5 = time.perf_counter()
+
+            stages['embedding'].append(t1 - begin)
+            stages['semantic_search'].append(t2 - t1)
+            stages['semantic_search_int8'].append(t3 - t2)
+            stages['keyword_search'].append(t4 - t3)
+            stages['fusion'].append(t5 - t4)
+            # The int8 search is measured alongside, not part of the hybrid path
+            stages['total'].append((t5 - begin) - (t3 - t2))
+            if repeat == 0:
+                query_vectors.append(query_vector)
+
+    query_matrix = np.stack(query_vectors)
+    start = time.perf_counter()
+    exact_index.search_batch(query_matrix, args.top_k)
+    batched_seconds = time.perf_counter() - start
+    # Deeper exact results so that ties at the k-th score count as hits
+    exact = exact_index.search_batch(query_matrix, 2 * args.top_k)
+
+    if hasattr(embedder, 'close'):
+        embedder.close()
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'embedder': args.embedder,
+            'dimension': int(vectors.shape[1]),
+            'documents': len(documents),
+            'queries': len(queries),
+            'repeat': args.repeat,
+            'top_k': args.top_k,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'cpu_count': os.cpu_count()
+        },
+        'build_seconds': build,
+        'query_latency_ms': {stage: latency_summary(samples) for stage, samples in stages.items()},
+        'queries_per_second': {
+            'hybrid_sequential': len(stages['total']) / sum(stages['total']),
+            'semantic_batched': len(queries) / batched_seconds
+        },
+        f"recall_at_{args.top_k}": {
+            'int8': recall_at_k(int8_index.search_batch(query_matrix, args.top_k), exact, args.top_k),
+            f"int8_rerank_{args.rerank}": recall_at_k(
+                int8_rerank_index.search_batch(query_matrix, args.top_k), exact, args.top_k
+            )
+        },
+        'index_bytes': {
+            'dense': exact_index.nbytes,
+            'int8': int8_index.nbytes
+        },
+        'document_bytes_per_doc': {
+            'dicts': document_memory['dict_bytes_per_document'],
+            'store': document_memory['store_bytes_per_document']
+        },
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def _flatten(results: Dict, prefix: str = '') -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(current: Dict, baseline: Dict) -> List[str]:
+    """One line per metric present in both runs, with the relative change"""
+    lines = []
+    current_flat = _flatten({k: v for k, v in current.items() if k != 'meta'})
+    baseline_flat = _flatten({k: v for k, v in baseline.items() if k != 'meta'})
+    for name, value in current_flat.items():
+        if name not in baseline_flat:
+            continue
+        previous = baseline_flat[name]
+        change = (value - previous) / previous * 100 if previous else 0.0
+        lines.append(f"{name:<48} {previous:12.4f} -> {value:12.4f} ({change:+6.1f}%)")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline retrieval benchmark")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--embedder', choices=['hashing', 'model'], default='hashing')
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Processes for --embedder model (default: the config's num_workers)")
+    parser.add_argument('--config', default='config/rag_config.yaml')
+    parser.add_argument('--limit', type=int, default=None, help="Only index the first N rows")
+    parser.add_argument('--sampled-queries', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--rerank', type=int, default=4)
+    parser.add_argument('--semantic-weight', type=float, default=0.7)
+    parser.add_argument('--seed', type=int, default=13)
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--baseline', default=None, help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    results = run_benchmark(args)
+
+    output = args.output or os.path.join(
+        'benchmarks', 'results',
+        f"retrieval-{args.embedder}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+    meta = results['meta']
+    print(f"{meta['documents']} documents, {meta['queries']} queries x {meta['repeat']} "
+          f"({meta['embedder']} embedder, dim {meta['dimension']})")
+    for stage, seconds in results['build_seconds'].items():
+        print(f"  build {stage:<20} {seconds * 1000:10.1f} ms")
+    for stage, summary in results['query_latency_ms'].items():
+        print(f"  query {stage:<20} p50 {summary['p50']:8.3f}  p95 {summary['p95']:8.3f}  "
+              f"p99 {summary['p99']:8.3f} ms")
+    for name, qps in results['queries_per_second'].items():
+        print(f"  {name:<26} {qps:10.1f} queries/s")
+    for name, recall in results[f"recall_at_{args.top_k}"].items():
+        print(f"  recall@{args.top_k} {name:<17} {recall:10.4f}")
+    per_doc = results['document_bytes_per_doc']
+    print(f"  documents {per_doc['dicts']:.0f} B/doc as dicts, {per_doc['store']:.0f} B/doc in DocumentStore")
+    print(f"  peak RSS {results['peak_rss_mb']:.1f} MB")
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.baseline}:")
+        print('\n'.join(compare(results, baseline)))
+
+
+if __name__ == "__main__":
+    main()
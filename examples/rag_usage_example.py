@@ -5,20 +5,20 @@ Example usage of the RAG system for SG Career Atlas
 import streamlit as st
 from src.rag import RAGService
 
+# Example queries (also used by benchmarks/retrieval_benchmark.py)
+example_queries = [
+    "What skills do I need to become a data scientist in Singapore?",
+    "Show me career progression from junior developer to tech lead",
+    "What are the technical competencies for cloud computing roles?",
+    "I have Python and SQL skills, what jobs can I apply for?",
+    "What's the difference between Level 3 and Level 4 proficiency?",
+    "Recommend training for transitioning to cybersecurity"
+]
+
 def main():
     # Initialize RAG service
     rag_service = RAGService()
     
-    # Example queries
-    example_queries = [
-        "What skills do I need to become a data scientist in Singapore?",
-        "Show me career progression from junior developer to tech lead",
-        "What are the technical competencies for cloud computing roles?",
-        "I have Python and SQL skills, what jobs can I apply for?",
-        "What's the difference between Level 3 and Level 4 proficiency?",
-        "Recommend training for transitioning to cybersecurity"
-    ]
-    
     st.title("RAG System Demo")
     
     # Query input
@@ -1,26 +1,75 @@
 # RAG Module Initialization
+#
+# Submodules are imported on first attribute access so that importing the
+# package (e.g. for src.rag.startup) does not pull in torch and friends.
 
-from .data_processor import SkillsDataProcessor
-from .document_creator import DocumentCreator
-from .embeddings import EmbeddingGenerator
-from .vector_store import VectorStore
-from .query_processor import QueryProcessor, QueryIntent
-from .retrieval_system import HybridRetriever
-from .context_builder import ContextBuilder
-from .response_generator import ResponseGenerator
-from .rag_service import RAGService
-
-__all__ = [
-    'SkillsDataProcessor',
-    'DocumentCreator',
-    'EmbeddingGenerator',
-    'VectorStore',
-    'QueryProcessor',
-    'QueryIntent',
-    'HybridRetriever',
-    'ContextBuilder',
-    'ResponseGenerator',
-    'RAGService'
-]
+import importlib
+from typing import TYPE_CHECKING
+
+_LAZY_ATTRS = {
+    'SkillsDataProcessor': '.data_processor',
+    'DocumentCreator': '.document_creator',
+    'EmbeddingGenerator': '.embeddings',
+    'CPUEmbeddingEngine': '.embedding_engine',
+    'VectorStore': '.vector_store',
+    'QueryProcessor': '.query_processor',
+    'QueryIntent': '.query_processor',
+    'HybridRetriever': '.retrieval_system',
+    'ContextBuilder': '.context_builder',
+    'ResponseGenerator': '.response_generator',
+    'RAGService': '.rag_service',
+    'KeywordIndex': '.indexes',
+    'MetadataIndex': '.indexes',
+    'IncrementalIndexRefresher': '.index_refresh',
+    'ModelPreloader': '.startup',
+    'PipelineMetrics': '.metrics',
+    'HashingEmbedder': '.hashing_embedder',
+    'DenseIndex': '.dense_index',
+    'QuantizedDenseIndex': '.dense_index',
+    'MicroBatcher': '.api_server',
+    'RetrievalService': '.api_server',
+    'LLMClient': '.llm_client',
+    'RetryBudget': '.llm_client',
+    'ConversationState': '.conversation_state',
+    'ConversationalRetriever': '.conversation',
+    'DocumentStore': '.document_store'
+}
+
+__all__ = list(_LAZY_ATTRS)
 
 __version__ = '1.0.0'
+
+if TYPE_CHECKING:
+    from .data_processor import SkillsDataProcessor
+    from .document_creator import DocumentCreator
+    from .embeddings import EmbeddingGenerator
+    from .embedding_engine import CPUEmbeddingEngine
+    from .vector_store import VectorStore
+    from .query_processor import QueryProcessor, QueryIntent
+    from .retrieval_system import HybridRetriever
+    from .context_builder import ContextBuilder
+    from .response_generator import ResponseGenerator
+    from .rag_service import RAGService
+    from .indexes import KeywordIndex, MetadataIndex
+    from .index_refresh import IncrementalIndexRefresher
+    from .startup import ModelPreloader
+    from .metrics import PipelineMetrics
+    from .hashing_embedder import HashingEmbedder
+    from .dense_index import DenseIndex, QuantizedDenseIndex
+    from .api_server import MicroBatcher, RetrievalService
+    from .llm_client import LLMClient, RetryBudget
+    from .conversation import ConversationalRetriever
+    from .conversation_state import ConversationState
+    from .document_store import DocumentStore
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_ATTRS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
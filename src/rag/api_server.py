@@ -0,0 +1,464 @@
+"""
+Headless retrieval HTTP API.
+
+A small keep-alive JSON service that lets other services reuse the
+index without going through Streamlit:
+
+    POST /search    {"query": ..., "top_k": 10, "mode": "hybrid"}
+    POST /retrieve  {"query": ..., "top_k": 10}   (QueryProcessor + HybridRetriever)
+    POST /answer    {"query": ...}                (RAGService.process_user_query)
+    GET  /healthz
+
+Concurrent /search requests that arrive within ``max_wait_ms`` of each
+other are coalesced by a ``MicroBatcher`` into one embedding batch and
+one matrix search. ``main`` applies the config's ``monitoring`` section,
+so every POST is traced: a Prometheus ``/metrics`` endpoint and one JSON
+log line per request, with the stage timings of that request. With
+``--no-monitoring`` requests are not traced at all.
+
+    python -m src.rag.api_server --port 8080
+"""
+
+import argparse
+import enum
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+import yaml
+
+from .dense_index import DenseIndex
+from .document_store import DocumentStore
+from .fusion import reciprocal_rank_fusion
+from .indexes import KeywordIndex
+from .metrics import metrics, setup_monitoring
+
+logger = logging.getLogger(__name__)
+
+SEARCH_MODES = ('hybrid', 'semantic', 'keyword')
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-item calls into batched calls on one worker
+
+    A batch is dispatched as soon as it holds every request currently in
+    flight, when it reaches ``max_batch_size``, or ``max_wait_ms`` after
+    its first item, whichever comes first. A lone request is therefore
+    never delayed.
+
+    ``batch_fn`` may return an exception in place of an item's result;
+    only that item's future fails, the rest of the batch still succeeds.
+    """
+
+    def __init__(self, batch_fn: Callable[[List], Sequence], max_batch_size: int = 32,
+                 max_wait_ms: float = 5.0, name: str = 'micro-batcher'):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: queue.Queue = queue.Queue()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self.batches = 0
+        self.items = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item) -> Future:
+        """Queue ``item`` and return a future for its result"""
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        future: Future = Future()
+        with self._lock:
+            self._in_flight += 1
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item):
+        return self.submit(item).result()
+
+    def close(self):
+        """Stop the worker after the queued items are processed"""
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.items / self.batches if self.batches else 0.0
+
+    def _collect(self, first) -> List:
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            with self._lock:
+                waiting_for_more = self._in_flight > len(batch)
+            try:
+                if waiting_for_more:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    entry = self._queue.get(timeout=remaining)
+                else:
+                    entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:
+                self._queue.put(None)
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            items = [item for item, _ in batch]
+            try:
+                results = self.batch_fn(items)
+                for (_, future), result in zip(batch, results):
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._in_flight -= len(batch)
+                self.batches += 1
+                self.items += len(batch)
+
+
+class CoalescingEncoder:
+    """Model wrapper whose single-text ``encode`` calls are micro-batched
+
+    Assign it as ``embedding_generator.model`` so that QueryProcessor's
+    per-query ``model.encode(query)`` calls from concurrent requests share
+    one forward pass.
+    """
+
+    def __init__(self, model, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.model = model
+        self.batcher = MicroBatcher(lambda texts: list(model.encode(texts)),
+                                    max_batch_size, max_wait_ms, name='encode-batcher')
+
+    def encode(self, texts, **kwargs):
+        if isinstance(texts, str):
+            return self.batcher(texts)
+        return self.model.encode(texts, **kwargs)
+
+
+class RetrievalService:
+    """Hybrid search over the in-memory indexes, micro-batched across callers"""
+
+    def __init__(self, embedder, dense_index: DenseIndex, keyword_index: KeywordIndex,
+                 documents: Mapping[str, Dict], query_processor=None, retriever=None,
+                 rag_service=None, semantic_weight: float = 0.7, max_batch_size: int = 32,
+                 max_wait_ms: float = 5.0):
+        self.embedder = embedder
+        self.dense_index = dense_index
+        self.keyword_index = keyword_index
+        self.documents = documents
+        self.query_processor = query_processor
+        self.retriever = retriever
+        self.rag_service = rag_service
+        self.semantic_weight = semantic_weight
+        self.batcher = (
+            MicroBatcher(self._search_batch, max_batch_size, max_wait_ms, name='search-batcher')
+            if max_batch_size > 1 else None
+        )
+
+    def search(self, query: str, top_k: int = 10, mode: str = 'hybrid',
+               stages: Optional[Dict[str, float]] = None) -> List[Dict]:
+        """Search the indexes, sharing work with concurrent callers
+
+        Stage timings of this request are added to ``stages`` if given;
+        shared embedding and semantic search count the whole batch.
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"mode must be one of {', '.join(SEARCH_MODES)}")
+        if not isinstance(query, str):
+            raise ValueError("query must be a string")
+        if not isinstance(top_k, int) or isinstance(top_k, bool) or top_k < 1:
+            raise ValueError("top_k must be a positive integer")
+        request = (query, top_k, mode)
+        if self.batcher is None:
+            result = self._search_batch([request])[0]
+            if isinstance(result, Exception):
+                raise result
+        else:
+            result = self.batcher(request)
+        results, timings = result
+        if stages is not None:
+            for stage, seconds in timings.items():
+                stages[stage] = stages.get(stage, 0.0) + seconds
+        return results
+
+    def _search_batch(self, requests: List[tuple]) -> List:
+        """``(results, stage timings)`` per request, or the exception that request raised"""
+        shared: Dict[str, float] = {}
+        try:
+            semantic = self._semantic_batch(requests, shared)
+        except Exception as e:
+            if len(requests) == 1:
+                return [e]
+            # Isolate the request that broke the shared embedding call
+            return [self._search_batch([request])[0] for request in requests]
+
+        responses = []
+        for i, request in enumerate(requests):
+            try:
+                timings = dict(shared)
+                responses.append((self._rank(request, semantic.get(i), timings), timings))
+            except Exception as e:
+                responses.append(e)
+        return responses
+
+    def _semantic_batch(self, requests: List[tuple], timings: Dict[str, float]) -> Dict[int, List[Dict]]:
+        semantic_rows = [i for i, (_, _, mode) in enumerate(requests) if mode != 'keyword']
+        semantic: Dict[int, List[Dict]] = {}
+        if semantic_rows:
+            depth = max(requests[i][1] for i in semantic_rows)
+            with metrics.stage('embedding', timings):
+                vectors = np.asarray(self.embedder.encode([requests[i][0] for i in semantic_rows]))
+            with metrics.stage('semantic_search', timings):
+                for i, results in zip(semantic_rows, self.dense_index.search_batch(vectors, depth)):
+                    semantic[i] = results[:requests[i][1]]
+        return semantic
+
+    def _rank(self, request: tuple, semantic: Optional[List[Dict]], timings: Dict[str, float]) -> List[Dict]:
+        query, top_k, mode = request
+        if mode == 'semantic':
+            ranked = semantic
+        else:
+            with metrics.stage('keyword_search', timings):
+                keyword = self.keyword_index.search(query, top_k)
+            if mode == 'keyword':
+                ranked = keyword
+            else:
+                with metrics.stage('fusion', timings):
+                    ranked = reciprocal_rank_fusion(
+                        [semantic, keyword], [self.semantic_weight, 1 - self.semantic_weight],
+                        top_k=top_k
+                    )
+        return [self._source(result) for result in ranked]
+
+    def _source(self, result: Dict) -> Dict:
+        doc = self.documents.get(result['id'], {})
+        return {
+            'id': result['id'],
+            'score': result['score'],
+            'title': doc.get('title'),
+            'type': doc.get('type'),
+            'metadata': doc.get('metadata', {})
+        }
+
+    def retrieve(self, query: str, top_k: int = 10) -> Dict:
+        """Run the planned QueryProcessor + HybridRetriever path"""
+        processed = self.query_processor.process_query(query)
+        return {
+            'intent': processed['intent'],
+            'entities': processed.get('entities', {}),
+            'results': self.retriever.retrieve(processed, top_k=top_k)
+        }
+
+    def answer(self, query: str) -> Dict:
+        """Run the full RAGService pipeline"""
+        return self.rag_service.process_user_query(query)
+
+    def close(self):
+        if self.batcher is not None:
+            self.batcher.close()
+
+
+def _to_json(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, np.ndarray):
+        return None  # embeddings are not part of the API
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def make_handler(service: RetrievalService, trace_requests: bool = True):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out as separate writes; without TCP_NODELAY
+        # keep-alive clients stall on delayed ACKs
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            logger.debug("%s - %s", self.address_string(), format % args)
+
+        def do_GET(self):
+            if self.path == '/healthz':
+                self._send(200, {'status': 'ok', 'documents': len(service.dense_index)})
+            else:
+                self._send(404, {'error': f"Unknown path {self.path}"})
+
+        def do_POST(self):
+            if not trace_requests:
+                status, payload, _ = self._post()
+                self._send(status, payload)
+                return
+            # One structured log line and request-latency sample per call
+            with metrics.trace(endpoint=self.path) as trace:
+                status, payload, error = self._post(trace)
+                trace.annotate(status=status, results=len(payload.get('results', ())))
+                if error is not None:
+                    trace.finish(error)
+            self._send(status, payload)
+
+        def _post(self, trace=None) -> tuple:
+            """``(status, payload, unexpected error or None)`` for a POST"""
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                if length < 0:
+                    # rfile.read(-1) would block until the client closes, and
+                    # the unread body would be parsed as the next request
+                    self.close_connection = True
+                    raise ValueError("Content-Length must not be negative")
+                body = json.loads(self.rfile.read(length) or b'{}')
+                if not isinstance(body, dict):
+                    raise ValueError("body must be a JSON object")
+                query = body['query']
+                top_k = body.get('top_k', 10)
+                if not isinstance(query, str):
+                    raise ValueError("query must be a string")
+                if not isinstance(top_k, int) or isinstance(top_k, bool) or top_k < 1:
+                    raise ValueError("top_k must be a positive integer")
+            except (KeyError, TypeError, ValueError) as e:
+                return 400, {'error': f"Invalid request: {e}"}, None
+
+            try:
+                if self.path == '/search':
+                    stages: Dict[str, float] = {}
+                    payload = {'results': service.search(query, top_k, body.get('mode', 'hybrid'), stages)}
+                    if trace is not None:
+                        trace.add_stages(stages)
+                elif self.path == '/retrieve':
+                    if service.retriever is None or service.query_processor is None:
+                        return 503, {'error': 'retrieve is not configured'}, None
+                    payload = service.retrieve(query, top_k)
+                elif self.path == '/answer':
+                    if service.rag_service is None:
+                        return 503, {'error': 'answer is not configured'}, None
+                    payload = service.answer(query)
+                else:
+                    return 404, {'error': f"Unknown path {self.path}"}, None
+            except ValueError as e:
+                return 400, {'error': str(e)}, None
+            except Exception as e:
+                logger.exception("Request to %s failed", self.path)
+                return 500, {'error': repr(e)}, e
+            return 200, payload, None
+
+        def _send(self, status: int, payload: Dict):
+            data = json.dumps(payload, default=_to_json).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+class _Server(ThreadingHTTPServer):
+    request_queue_size = 256
+    daemon_threads = True
+
+
+def make_server(service: RetrievalService, host: str = '127.0.0.1', port: int = 8080,
+                trace_requests: bool = True) -> ThreadingHTTPServer:
+    """Create (but do not start) the HTTP server for ``service``"""
+    return _Server((host, port), make_handler(service, trace_requests))
+
+
+def build_service(data_dir: str = 'data', embedder=None, max_batch_size: int = 32,
+                  max_wait_ms: float = 5.0, semantic_weight: float = 0.7) -> RetrievalService:
+    """Index the skills corpus in ``data_dir`` and wrap it in a service"""
+    from .index_refresh import iter_source_rows, row_to_document
+    from .hashing_embedder import HashingEmbedder
+
+    embedder = embedder or HashingEmbedder()
+    documents = [row_to_document(doc_id, source, row)
+                 for doc_id, source, row in iter_source_rows(data_dir)]
+    vectors = embedder.encode([doc['content'] for doc in documents])
+    keyword_index = KeywordIndex()
+    keyword_index.upsert(documents)
+    metrics.set_index_size('dense', len(documents))
+    metrics.set_index_size('keyword', len(keyword_index))
+    return RetrievalService(
+        embedder,
+        DenseIndex([doc['id'] for doc in documents], vectors),
+        keyword_index,
+        DocumentStore(documents),
+        semantic_weight=semantic_weight,
+        max_batch_size=max_batch_size,
+        max_wait_ms=max_wait_ms
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve retrieval over HTTP")
+    parser.add_argument('--config', default='config/rag_config.yaml',
+                        help="Defaults come from its ``api`` section when the file exists")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--embedder', choices=['hashing', 'model'], default='hashing')
+    parser.add_argument('--max-batch-size', type=int, default=32,
+                        help="1 disables micro-batching")
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    parser.add_argument('--no-monitoring', action='store_true',
+                        help="Skip the config's /metrics endpoint and per-request tracing and JSON logs")
+    config_path = parser.parse_known_args()[0].config
+    config = {}
+    if os.path.exists(config_path):
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+        api_config = config.get('api', {})
+        batching = api_config.get('micro_batching', {})
+        parser.set_defaults(
+            host=api_config.get('host', '127.0.0.1'),
+            port=api_config.get('port', 8080),
+            max_batch_size=batching.get('max_batch_size', 32),
+            max_wait_ms=batching.get('max_wait_ms', 5.0)
+        )
+    args = parser.parse_args()
+    if not args.no_monitoring:
+        setup_monitoring(config)
+
+    embedder = None
+    if args.embedder == 'model':
+        from .embedding_engine import CPUEmbeddingEngine
+        # Micro-batching already fills the model's batches; one process is enough
+        embedder = CPUEmbeddingEngine.from_config(config.get('embedding', {}), num_workers=1)
+    service = build_service(args.data_dir, embedder, args.max_batch_size, args.max_wait_ms)
+    server = make_server(service, args.host, args.port, trace_requests=not args.no_monitoring)
+    print(f"Serving {len(service.dense_index)} documents on http://{args.host}:{server.server_address[1]}",
+          flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
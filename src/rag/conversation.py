@@ -0,0 +1,178 @@
+"""
+Conversation-aware retrieval for multi-turn AI Assistant sessions.
+
+``ConversationState`` (``conversation_state.py``) lives in
+``st.session_state``. It keeps the recent messages, a summary of older
+ones, and the previous search's candidate set and embeddings.
+
+``ConversationalRetriever`` resolves follow-up turns (the suggestion
+chips, "which jobs need these skills?") by re-scoring that candidate
+set against the follow-up blended with the earlier query. It falls back
+to a full hybrid search when the follow-up brings in terms the
+candidates do not cover, or when the best re-scored match is weak.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+from .conversation_state import ConversationState
+from .dense_index import DenseIndex
+from .fusion import reciprocal_rank_fusion
+from .indexes import KeywordIndex, tokenize
+from .metrics import metrics
+
+# Mirrors RAGService._generate_suggestions in the implementation plan
+FOLLOW_UP_SUGGESTIONS = {
+    'job_search': [
+        "What skills do I need for this role?",
+        "Show me the career progression path",
+        "What's the salary range?"
+    ],
+    'skill_inquiry': [
+        "Where can I learn these skills?",
+        "Which jobs require these skills?",
+        "What's the proficiency level needed?"
+    ],
+    'career_path': [
+        "What skills should I develop next?",
+        "Show me similar career paths",
+        "How long does progression typically take?"
+    ]
+}
+
+_STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'about', 'be', 'can', 'could', 'do', 'does', 'for', 'from',
+    'get', 'give', 'have', 'how', 'i', 'if', 'in', 'into', 'is', 'me', 'more', 'my', 'need',
+    'needed', 'of', 'on', 'or', 'please', 's', 'should', 'show', 'tell', 'than', 'the', 'to',
+    'what', 'when', 'where', 'which', 'who', 'why', 'will', 'with', 'would', 'you', 'your'
+}
+
+# Words that point back at the previous answer rather than at a new topic
+_REFERENCE_TERMS = {'it', 'its', 'that', 'them', 'their', 'there', 'these', 'they', 'this', 'those'}
+
+# Terms that carry no topic of their own in a follow-up turn
+GENERIC_TERMS = _STOPWORDS | _REFERENCE_TERMS | {
+    term for suggestions in FOLLOW_UP_SUGGESTIONS.values()
+    for suggestion in suggestions for term in tokenize(suggestion)
+}
+
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+
+class ConversationalRetriever:
+    """Hybrid retrieval that re-scores the previous candidates for follow-ups"""
+
+    def __init__(self, embedder, dense_index: DenseIndex, keyword_index: Optional[KeywordIndex] = None,
+                 candidate_pool: int = 50, semantic_weight: float = 0.7, anchor_weight: float = 1.0,
+                 follow_up_weight: float = 0.3, min_confidence: float = 0.8,
+                 embedding_cache_size: int = 256):
+        self.embedder = embedder
+        self.dense_index = dense_index
+        self.keyword_index = keyword_index
+        self.candidate_pool = candidate_pool
+        self.semantic_weight = semantic_weight
+        self.anchor_weight = anchor_weight
+        self.follow_up_weight = follow_up_weight
+        self.min_confidence = min_confidence
+        self.embedding_cache_size = embedding_cache_size
+        self._embeddings: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+        # One retriever serves every Streamlit session's thread
+        self._embeddings_lock = threading.Lock()
+
+    def retrieve(self, query: str, state: ConversationState, top_k: int = 10) -> Dict:
+        """Results for ``query`` plus whether the previous candidates were reused"""
+        state.turns += 1
+        with metrics.stage('embedding'):
+            query_vector = self._embed(query)
+        tokens = set(tokenize(query))
+        terms = tokens - GENERIC_TERMS
+        refers_back = not terms or bool(_REFERENCE_TERMS & tokens)
+
+        if not state.has_candidates:
+            reason = 'first_turn'
+        elif not refers_back:
+            reason = 'new_question'
+        elif terms - state.candidate_terms:
+            reason = 'new_terms'
+        else:
+            with metrics.stage('follow_up_rescore'):
+                # A bare follow-up ("where can I learn these skills?") is
+                # mostly about the earlier topic; its own words only re-rank
+                weight = 1.0 if terms else self.follow_up_weight
+                blended = _normalize(weight * query_vector + self.anchor_weight * state.anchor_vector)
+                scores = state.candidate_vectors @ blended
+                order = np.argsort(-scores, kind='stable')[:top_k]
+            confidence = float(scores[order[0]]) / max(state.anchor_score, 1e-12)
+            if confidence >= self.min_confidence:
+                state.reused_turns += 1
+                return {
+                    'results': [{'id': state.candidate_ids[i], 'score': float(scores[i])} for i in order],
+                    'reused': True,
+                    'reason': 'rescored',
+                    'confidence': confidence
+                }
+            reason = 'low_confidence'
+
+        anchor_query, anchor_vector = query, query_vector
+        search_text, search_vector = query, query_vector
+        if reason in ('new_terms', 'low_confidence'):
+            # A follow-up the candidates could not answer still refers to
+            # the earlier topic, so search for both together. The topic
+            # stays the anchor; otherwise every fallback would append to it
+            anchor_query, anchor_vector = state.anchor_query, state.anchor_vector
+            search_text = f"{anchor_query} {query}"
+            search_vector = _normalize(query_vector + self.anchor_weight * anchor_vector)
+
+        results = self._full_search(search_text, search_vector)
+        candidate_ids = [result['id'] for result in results]
+        state.remember(anchor_query, anchor_vector, candidate_ids,
+                       self.dense_index.vectors_for(candidate_ids), self._terms_of(candidate_ids))
+        return {
+            'results': results[:top_k],
+            'reused': False,
+            'reason': reason,
+            'confidence': None
+        }
+
+    def _embed(self, text: str) -> np.ndarray:
+        with self._embeddings_lock:
+            vector = self._embeddings.get(text)
+            if vector is not None:
+                self._embeddings.move_to_end(text)
+        metrics.record_cache('query_embedding', vector is not None)
+        if vector is not None:
+            return vector
+        # Encode outside the lock so sessions don't queue behind each other
+        vector = _normalize(np.asarray(self.embedder.encode([text])[0], dtype=np.float32))
+        with self._embeddings_lock:
+            self._embeddings[text] = vector
+            while len(self._embeddings) > self.embedding_cache_size:
+                self._embeddings.popitem(last=False)
+        return vector
+
+    def _full_search(self, text: str, vector: np.ndarray) -> List[Dict]:
+        with metrics.stage('semantic_search'):
+            semantic = self.dense_index.search(vector, self.candidate_pool)
+        if self.keyword_index is None:
+            return semantic
+        with metrics.stage('keyword_search'):
+            keyword = self.keyword_index.search(text, self.candidate_pool)
+        with metrics.stage('fusion'):
+            return reciprocal_rank_fusion([semantic, keyword],
+                                          [self.semantic_weight, 1 - self.semantic_weight],
+                                          top_k=self.candidate_pool)
+
+    def _terms_of(self, doc_ids: List[str]) -> Set[str]:
+        # Without a keyword index no terms count as covered, so only
+        # follow-ups with no topic words of their own are re-scored
+        if self.keyword_index is None:
+            return set()
+        terms: Set[str] = set()
+        for doc_id in doc_ids:
+            terms.update(self.keyword_index.doc_terms.get(doc_id, ()))
+        return terms
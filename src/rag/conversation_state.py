@@ -0,0 +1,98 @@
+"""
+Chat session state for the AI Assistant page.
+
+``ConversationState`` lives in ``st.session_state``. It keeps the most
+recent messages, folds older ones into a one-line-per-question summary,
+and holds the previous search's candidate set for
+``ConversationalRetriever`` (``src/rag/conversation.py``).
+
+It imports nothing outside the standard library, so app.py can use it
+without pulling in the retrieval or monitoring dependencies.
+"""
+
+from typing import Any, Dict, List, Optional, Set
+
+
+def _shorten(text: str, limit: int = 80) -> str:
+    text = ' '.join(text.split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + '...'
+
+
+class ConversationState:
+    """Recent messages, a summary of older ones, and the last candidate set"""
+
+    def __init__(self, max_messages: int = 12, max_summary_lines: int = 20,
+                 full_source_messages: int = 2):
+        self.max_messages = max_messages
+        self.max_summary_lines = max_summary_lines
+        self.full_source_messages = full_source_messages
+        self.messages: List[Dict] = []
+        self.summary: List[str] = []
+        self.compacted = 0
+        self.anchor_query: Optional[str] = None
+        self.anchor_vector: Optional[Any] = None
+        self.anchor_score = 0.0
+        self.candidate_ids: List[str] = []
+        self.candidate_vectors: Optional[Any] = None
+        self.candidate_terms: Set[str] = set()
+        self.turns = 0
+        self.reused_turns = 0
+
+    @property
+    def has_candidates(self) -> bool:
+        return self.candidate_vectors is not None and len(self.candidate_ids) > 0
+
+    def add_message(self, role: str, content: str, **extra) -> Dict:
+        """Append a message, then compact the history"""
+        message = {'role': role, 'content': content, **extra}
+        self.messages.append(message)
+        self.compact()
+        return message
+
+    def compact(self):
+        """Fold messages beyond ``max_messages`` into the summary
+
+        Older assistant messages also keep only the title and type of
+        their sources, since full source documents dominate the size of
+        the session state.
+        """
+        overflow = len(self.messages) - self.max_messages
+        if overflow > 0:
+            for message in self.messages[:overflow]:
+                if message['role'] == 'user':
+                    self.summary.append(_shorten(message['content']))
+            del self.messages[:overflow]
+            del self.summary[:-self.max_summary_lines]
+            self.compacted += overflow
+
+        with_sources = [m for m in self.messages if m.get('sources')]
+        for message in with_sources[:-self.full_source_messages or None]:
+            message['sources'] = [{'title': s.get('title'), 'type': s.get('type')}
+                                  for s in message['sources']]
+
+    def history(self, max_messages: Optional[int] = None) -> List[Dict]:
+        """Chat messages for an LLM prompt: the summary plus recent turns"""
+        recent = self.messages[-max_messages:] if max_messages else self.messages
+        history = [{'role': m['role'], 'content': m['content']} for m in recent]
+        if self.summary:
+            history.insert(0, {
+                'role': 'system',
+                'content': "Earlier in this conversation the user asked: " + "; ".join(self.summary)
+            })
+        return history
+
+    def remember(self, query: str, query_vector, candidate_ids: List[str],
+                 candidate_vectors, candidate_terms: Set[str]):
+        """Keep a full search's candidates for the following turns"""
+        self.anchor_query = query
+        self.anchor_vector = query_vector
+        self.anchor_score = float((candidate_vectors @ query_vector).max()) if len(candidate_ids) else 0.0
+        self.candidate_ids = list(candidate_ids)
+        self.candidate_vectors = candidate_vectors
+        self.candidate_terms = candidate_terms
+
+    def forget_candidates(self):
+        self.anchor_query = self.anchor_vector = self.candidate_vectors = None
+        self.anchor_score = 0.0
+        self.candidate_ids = []
+        self.candidate_terms = set()
@@ -0,0 +1,203 @@
+"""
+Compact column store for RAG documents.
+
+Documents are dicts with an id, a few categorical fields (type, title,
+category, ...), a text ``content`` and a nested ``metadata`` dict. Held
+as dicts, every one of them carries its own hash table, and the same
+sector and category strings are repeated thousands of times.
+``DocumentStore`` keeps them as columns instead:
+
+- every field and metadata field is an ``array('I')`` of codes into one
+  shared table of distinct values, so each distinct string is stored once
+- all ``content`` text lives in one UTF-8 buffer, addressed by offsets
+- source dicts are only built when a document is read, which is usually
+  just the handful shown as sources for a query
+
+The store is a read-only ``Mapping`` of id to document, so it can stand
+in for the ``{doc_id: doc}`` dicts the pipeline passes around.
+
+    python -m src.rag.document_store   # bytes per document on data/
+"""
+
+import argparse
+import sys
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+METADATA_PREFIX = 'metadata.'
+_MISSING = 0  # code 0 marks a field the document does not have
+
+
+class DocumentStore(Mapping):
+    """Documents as dictionary-coded columns plus one shared text buffer"""
+
+    def __init__(self, documents: Iterable[Dict] = ()):
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._values: List = [None]
+        self._codes: Dict[Tuple[type, Hashable], int] = {}
+        self._columns: Dict[str, array] = {}
+        self._text = bytearray()
+        self._offsets = array('Q', [0])
+        # Values that cannot be dictionary-coded (lists, dicts), by row
+        self._extras: Dict[int, Dict[str, object]] = {}
+        self.extend(documents)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._rows)
+
+    def __contains__(self, doc_id) -> bool:
+        return doc_id in self._rows
+
+    def __getitem__(self, doc_id: str) -> Dict:
+        return self._materialize(self._rows[doc_id])
+
+    def add(self, document: Dict):
+        """Store ``document``; a repeated id replaces the earlier version"""
+        row = len(self._ids)
+        self._ids.append(document['id'])
+        self._rows[document['id']] = row
+
+        content = document.get('content', '').encode('utf-8')
+        self._text += content
+        self._offsets.append(len(self._text))
+
+        for name, value in document.items():
+            if name in ('id', 'content'):
+                continue
+            if name == 'metadata' and isinstance(value, dict):
+                for key, item in value.items():
+                    self._set(row, METADATA_PREFIX + key, item)
+            else:
+                self._set(row, name, value)
+        for column in self._columns.values():
+            if len(column) == row:
+                column.append(_MISSING)
+
+    def extend(self, documents: Iterable[Dict]):
+        for document in documents:
+            self.add(document)
+
+    def discard(self, doc_id: str):
+        """Drop a document; its space is reclaimed by ``compact``"""
+        self._rows.pop(doc_id, None)
+
+    def compact(self) -> 'DocumentStore':
+        """A new store holding only the live documents"""
+        return DocumentStore(self.values())
+
+    def content(self, doc_id: str) -> str:
+        """The ``content`` of one document, without building the rest"""
+        row = self._rows[doc_id]
+        return str(memoryview(self._text)[self._offsets[row]:self._offsets[row + 1]], 'utf-8')
+
+    def field(self, doc_id: str, name: str, default=None):
+        """One field, e.g. ``'title'`` or ``'metadata.sector'``"""
+        row = self._rows[doc_id]
+        column = self._columns.get(name)
+        if column is not None and column[row] != _MISSING:
+            return self._values[column[row]]
+        return self._extras.get(row, {}).get(name, default)
+
+    def _set(self, row: int, name: str, value):
+        column = self._columns.get(name)
+        if column is None:
+            column = self._columns[name] = array('I', bytes(4 * row))
+        # Keyed by type as well, since True == 1 == 1.0 would share a code
+        key = (type(value), value)
+        try:
+            code = self._codes.get(key)
+        except TypeError:
+            self._extras.setdefault(row, {})[name] = value
+            column.append(_MISSING)
+            return
+        if code is None:
+            code = self._codes[key] = len(self._values)
+            self._values.append(value)
+        column.append(code)
+
+    def _materialize(self, row: int) -> Dict:
+        document = {'id': self._ids[row]}
+        metadata = {}
+        extras = self._extras.get(row, {})
+        for name, column in self._columns.items():
+            code = column[row]
+            if code == _MISSING:
+                if name not in extras:
+                    continue
+                value = extras[name]
+            else:
+                value = self._values[code]
+            if name.startswith(METADATA_PREFIX):
+                metadata[name[len(METADATA_PREFIX):]] = value
+            else:
+                document[name] = value
+        document['content'] = str(memoryview(self._text)[self._offsets[row]:self._offsets[row + 1]], 'utf-8')
+        document['metadata'] = metadata
+        return document
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the store"""
+        total = sys.getsizeof(self._text) + sys.getsizeof(self._offsets)
+        total += sum(sys.getsizeof(column) for column in self._columns.values())
+        total += sys.getsizeof(self._values) + sum(sys.getsizeof(value) for value in self._values)
+        total += sys.getsizeof(self._codes) + sum(sys.getsizeof(key) for key in self._codes)
+        total += sys.getsizeof(self._ids) + sum(sys.getsizeof(doc_id) for doc_id in self._ids)
+        total += sys.getsizeof(self._rows) + sum(sys.getsizeof(row) for row in self._rows.values())
+        total += _deep_sizeof(self._extras)
+        return total
+
+
+def _deep_sizeof(value, seen: Optional[set] = None) -> int:
+    """Size of ``value`` and everything it references, counting shared objects once"""
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_deep_sizeof(item, seen) for item in value)
+    return size
+
+
+def memory_report(documents: List[Dict], store: Optional[DocumentStore] = None) -> Dict:
+    """Bytes per document as a ``{doc_id: doc}`` dict versus a DocumentStore"""
+    store = store if store is not None else DocumentStore(documents)
+    dict_bytes = _deep_sizeof({doc['id']: doc for doc in documents})
+    count = max(len(documents), 1)
+    return {
+        'documents': len(documents),
+        'distinct_values': len(store._values) - 1,
+        'dict_bytes': dict_bytes,
+        'store_bytes': store.nbytes,
+        'dict_bytes_per_document': dict_bytes / count,
+        'store_bytes_per_document': store.nbytes / count,
+        'reduction': dict_bytes / max(store.nbytes, 1)
+    }
+
+
+def main():
+    from .index_refresh import iter_source_rows, row_to_document
+
+    parser = argparse.ArgumentParser(description="Compare document memory as dicts and as a DocumentStore")
+    parser.add_argument('--data-dir', default='data')
+    args = parser.parse_args()
+
+    documents = [row_to_document(doc_id, source, row)
+                 for doc_id, source, row in iter_source_rows(args.data_dir)]
+    report = memory_report(documents)
+    print(f"{report['documents']} documents, {report['distinct_values']} distinct field values")
+    print(f"  dicts  {report['dict_bytes'] / 2**20:8.1f} MiB  {report['dict_bytes_per_document']:8.0f} B/doc")
+    print(f"  store  {report['store_bytes'] / 2**20:8.1f} MiB  {report['store_bytes_per_document']:8.0f} B/doc")
+    print(f"  {report['reduction']:.1f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+CPU-optimised embedding engine.
+
+Texts are sorted by length and cut into batches so that each batch pads
+to roughly the same sequence length, and the batches are sharded across
+a process pool sized to the available cores. With more than one worker
+every call goes through the pool, so the parent never loads a model of
+its own. Workers are spawned rather than forked, since forking after
+torch/OpenMP has started its threads can deadlock. The model can
+optionally be run through an ONNX (optionally int8-quantized) export.
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+Encoder = Callable[[List[str]], np.ndarray]
+
+_worker_encoder: Optional[Encoder] = None
+
+
+def load_sentence_transformer(model_name: str, backend: str = 'torch',
+                              max_seq_length: int = 512, num_threads: int = 1,
+                              onnx_file_name: Optional[str] = None) -> Encoder:
+    """Load a sentence-transformers model and return a batch encode function"""
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError as e:
+        raise ImportError(
+            "sentence-transformers is required for embeddings; "
+            "install it with `pip install -r requirements_rag.txt`"
+        ) from e
+
+    if backend == 'torch':
+        import torch
+        torch.set_num_threads(num_threads)
+        model = SentenceTransformer(model_name, device='cpu')
+    elif backend == 'onnx':
+        # Needs sentence-transformers>=3.2 and optimum[onnxruntime]; use e.g.
+        # onnx_file_name="onnx/model_quint8_avx2.onnx" for the int8 export
+        os.environ.setdefault('OMP_NUM_THREADS', str(num_threads))
+        model_kwargs = {'file_name': onnx_file_name} if onnx_file_name else None
+        model = SentenceTransformer(model_name, device='cpu', backend='onnx',
+                                    model_kwargs=model_kwargs)
+    else:
+        raise ValueError(f"Unknown embedding backend: {backend}")
+
+    model.max_seq_length = min(max_seq_length, model.max_seq_length or max_seq_length)
+
+    def encode(texts: List[str]) -> np.ndarray:
+        return model.encode(texts, batch_size=len(texts), convert_to_numpy=True,
+                            show_progress_bar=False)
+
+    return encode
+
+
+def _init_worker(encoder_factory: Callable[..., Encoder], factory_kwargs: Dict):
+    global _worker_encoder
+    _worker_encoder = encoder_factory(**factory_kwargs)
+
+
+def _encode_batch(indices: List[int], texts: List[str]) -> Tuple[List[int], np.ndarray]:
+    return indices, np.asarray(_worker_encoder(texts), dtype=np.float32)
+
+
+def length_bucketed_batches(texts: List[str], batch_size: int) -> List[List[int]]:
+    """Group text indices into batches of similar length, longest first"""
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def padding_ratio(texts: List[str], batches: List[List[int]]) -> float:
+    """Padded characters per real character for a batching (1.0 is no padding)"""
+    real = sum(len(text) for text in texts)
+    padded = sum(max(len(texts[i]) for i in batch) * len(batch) for batch in batches)
+    return padded / max(real, 1)
+
+
+def embedding_agreement(embeddings: np.ndarray, reference: np.ndarray) -> Dict[str, float]:
+    """Row-wise cosine similarity between two embedding matrices"""
+    a = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True).clip(min=1e-12)
+    b = reference / np.linalg.norm(reference, axis=1, keepdims=True).clip(min=1e-12)
+    cosine = np.sum(a * b, axis=1)
+    return {
+        'mean_cosine': float(cosine.mean()),
+        'min_cosine': float(cosine.min())
+    }
+
+
+class CPUEmbeddingEngine:
+    """Length-bucketed, multi-process embedding on CPU"""
+
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2', batch_size: int = 32,
+                 max_seq_length: int = 512, num_workers: Optional[int] = None,
+                 backend: str = 'torch', onnx_file_name: Optional[str] = None,
+                 encoder_factory: Callable[..., Encoder] = load_sentence_transformer):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_seq_length = max_seq_length
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.backend = backend
+        self.onnx_file_name = onnx_file_name
+        self.encoder_factory = encoder_factory
+        self._local_encoder: Optional[Encoder] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.last_stats: Dict = {}
+
+    @classmethod
+    def from_config(cls, config: Dict, **kwargs) -> 'CPUEmbeddingEngine':
+        """Build an engine from the ``embedding`` section of rag_config.yaml
+
+        Keyword arguments override the config, e.g. ``num_workers=1``.
+        """
+        options = dict(
+            model_name=config.get('model_name', 'all-MiniLM-L6-v2'),
+            batch_size=config.get('batch_size', 32),
+            max_seq_length=config.get('max_seq_length', 512),
+            num_workers=config.get('num_workers'),
+            backend=config.get('backend', 'torch'),
+            onnx_file_name=config.get('onnx_file_name')
+        )
+        options.update(kwargs)
+        return cls(**options)
+
+    def _factory_kwargs(self, num_threads: int) -> Dict:
+        return {
+            'model_name': self.model_name,
+            'backend': self.backend,
+            'max_seq_length': self.max_seq_length,
+            'num_threads': num_threads,
+            'onnx_file_name': self.onnx_file_name
+        }
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            threads_per_worker = max(1, (os.cpu_count() or 1) // self.num_workers)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.encoder_factory, self._factory_kwargs(threads_per_worker))
+            )
+        return self._pool
+
+    def close(self):
+        """Shut down the worker pool"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embed ``texts`` and return vectors in input order"""
+        start = time.perf_counter()
+        batches = length_bucketed_batches(texts, self.batch_size)
+        vectors = None
+
+        if self.num_workers <= 1:
+            if self._local_encoder is None:
+                self._local_encoder = self.encoder_factory(
+                    **self._factory_kwargs(os.cpu_count() or 1)
+                )
+            results = [
+                (batch, np.asarray(self._local_encoder([texts[i] for i in batch]), dtype=np.float32))
+                for batch in batches
+            ]
+        else:
+            pool = self._get_pool()
+            futures = [pool.submit(_encode_batch, batch, [texts[i] for i in batch])
+                       for batch in batches]
+            results = [future.result() for future in futures]
+
+        for indices, batch_vectors in results:
+            if vectors is None:
+                vectors = np.empty((len(texts), batch_vectors.shape[1]), dtype=np.float32)
+            vectors[indices] = batch_vectors
+
+        elapsed = time.perf_counter() - start
+        self.last_stats = {
+            'documents': len(texts),
+            'batches': len(batches),
+            'seconds': elapsed,
+            'documents_per_second': len(texts) / elapsed if elapsed > 0 else 0.0,
+            'padding_ratio': padding_ratio(texts, batches) if texts else 1.0
+        }
+        if vectors is None:
+            return np.empty((0, 0), dtype=np.float32)
+        return vectors
+
+    def generate_embeddings(self, documents: List[Dict]) -> Dict[str, np.ndarray]:
+        """Drop-in replacement for ``EmbeddingGenerator.generate_embeddings``"""
+        vectors = self.encode([doc['content'] for doc in documents])
+        return {doc['id']: vector for doc, vector in zip(documents, vectors)}
+
+    def benchmark(self, texts: List[str], reference: Optional[np.ndarray] = None) -> Dict:
+        """Embed ``texts`` and report throughput and agreement with ``reference``"""
+        embeddings = self.encode(texts)
+        report = dict(self.last_stats)
+        if reference is not None:
+            report.update(embedding_agreement(embeddings, reference))
+        return report
+
+
+def main():
+    from .index_refresh import iter_source_rows, row_to_document
+
+    parser = argparse.ArgumentParser(description="Benchmark the CPU embedding engine")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--limit', type=int, default=2000)
+    parser.add_argument('--model-name', default='all-MiniLM-L6-v2')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--backend', choices=['torch', 'onnx'], default='torch')
+    parser.add_argument('--onnx-file-name', default=None)
+    args = parser.parse_args()
+
+    texts = []
+    for doc_id, source, row in iter_source_rows(args.data_dir):
+        texts.append(row_to_document(doc_id, source, row)['content'])
+        if len(texts) >= args.limit:
+            break
+
+    # Reference: the plain one-shot encode that EmbeddingGenerator performs
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(args.model_name, device='cpu')
+    start = time.perf_counter()
+    reference = model.encode(texts, show_progress_bar=False)
+    reference_rate = len(texts) / (time.perf_counter() - start)
+
+    engine = CPUEmbeddingEngine(args.model_name, batch_size=args.batch_size,
+                                num_workers=args.workers, backend=args.backend,
+                                onnx_file_name=args.onnx_file_name)
+    try:
+        report = engine.benchmark(texts, reference)
+    finally:
+        engine.close()
+
+    print(f"Reference (SentenceTransformer.encode): {reference_rate:.1f} docs/s")
+    print(f"Engine ({args.backend}, {engine.num_workers} workers): "
+          f"{report['documents_per_second']:.1f} docs/s, padding ratio {report['padding_ratio']:.2f}")
+    print(f"Agreement: mean cosine {report['mean_cosine']:.5f}, min cosine {report['min_cosine']:.5f}")
+
+
+if __name__ == "__main__":
+    main()
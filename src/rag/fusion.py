@@ -0,0 +1,21 @@
+"""
+Result fusion for hybrid (semantic + keyword) retrieval.
+"""
+
+from typing import Dict, List, Sequence
+
+
+def reciprocal_rank_fusion(result_lists: Sequence[List[Dict]], weights: Sequence[float],
+                           top_k: int = 10, k: int = 60) -> List[Dict]:
+    """Weighted reciprocal rank fusion of ranked ``{'id', 'score'}`` lists
+
+    Ranks rather than raw scores are combined, so cosine similarities and
+    BM25 scores need no calibration against each other.
+    """
+    fused: Dict[str, float] = {}
+    for results, weight in zip(result_lists, weights):
+        for rank, result in enumerate(results):
+            fused[result['id']] = fused.get(result['id'], 0.0) + weight / (k + rank + 1)
+
+    ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:top_k]
+    return [{'id': doc_id, 'score': score} for doc_id, score in ranked]
@@ -0,0 +1,56 @@
+"""
+Deterministic hashing embedder for offline tests and benchmarks.
+
+Tokens and token bigrams are hashed into a fixed number of signed
+buckets and the result is L2-normalised. It needs no model download,
+gives identical vectors on every machine, and exposes the same
+``generate_embeddings`` / ``model.encode`` surface as EmbeddingGenerator.
+"""
+
+import functools
+import zlib
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+from .indexes import tokenize
+
+
+class HashingEmbedder:
+    """Feature-hashing stand-in for a sentence-transformers model"""
+
+    def __init__(self, dimension: int = 384, cache_size: int = 1 << 16):
+        self.dimension = dimension
+        # Bounded, since every distinct query token and bigram is a new feature
+        self._bucket = functools.lru_cache(maxsize=cache_size)(self._hash_bucket)
+
+    @property
+    def model(self) -> 'HashingEmbedder':
+        # QueryProcessor calls ``embedding_generator.model.encode(query)``
+        return self
+
+    def _hash_bucket(self, feature: str) -> Tuple[int, float]:
+        h = zlib.crc32(feature.encode('utf-8'))
+        return h % self.dimension, 1.0 if h & 0x80000000 else -1.0
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        tokens = tokenize(text)
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            index, sign = self._bucket(feature)
+            vector[index] += sign
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def encode(self, texts: Union[str, List[str]], **kwargs) -> np.ndarray:
+        """Embed one text (1-D result) or a list of texts (2-D result)"""
+        if isinstance(texts, str):
+            return self._embed(texts)
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        return np.stack([self._embed(text) for text in texts])
+
+    def generate_embeddings(self, documents: List[Dict]) -> Dict[str, np.ndarray]:
+        """Generate embeddings for all documents"""
+        vectors = self.encode([doc['content'] for doc in documents])
+        return {doc['id']: vector for doc, vector in zip(documents, vectors)}
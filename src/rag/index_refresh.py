@@ -0,0 +1,272 @@
+"""
+Incremental index refresh driven by row-level diffs of new CSV drops.
+
+Every source row is keyed by its TSC code, proficiency level and
+knowledge/ability item text, and fingerprinted by the full row content.
+The keys and fingerprints of the current bundle are kept in a JSON
+manifest; a refresh diffs the new files against it and applies only
+inserts, updates and tombstone deletes to the indexes.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from .metrics import metrics
+from .schema_profiler import load_schema, read_csv_kwargs
+
+MANIFEST_VERSION = 1
+
+CODE_COLUMNS = ('TSC Code', 'TSC_CCS Code')
+PROFICIENCY_COLUMN = 'Proficiency Level'
+ITEM_COLUMN = 'Knowledge / Ability Items'
+
+
+def row_key(row: Dict[str, str]) -> str:
+    """Identity of a source row: TSC code + proficiency + item text"""
+    code = next((row[col] for col in CODE_COLUMNS if col in row), '')
+    return '|'.join((
+        code.strip(),
+        row.get(PROFICIENCY_COLUMN, '').strip(),
+        row.get(ITEM_COLUMN, '').strip()
+    ))
+
+
+def fingerprint_row(row: Dict[str, str]) -> str:
+    """Content hash over every column, independent of column order"""
+    payload = '\x1f'.join(f"{col}\x1e{row[col]}" for col in sorted(row))
+    return hashlib.md5(payload.encode('utf-8')).hexdigest()
+
+
+def iter_source_rows(data_dir: str, pattern: str = 'jobsandskills-*.csv',
+                     schema: Optional[Dict] = None) -> Iterator[Tuple[str, str, Dict[str, str]]]:
+    """Yield ``(doc_id, source, row)`` for every row of every matching file
+
+    Rows whose key repeats within a file get an ordinal suffix so that
+    each row maps to exactly one document id. Files are read with the
+    encoding and categorical columns recorded in ``schema`` (by default
+    ``data_dir/schema.json`` from ``analyze_schemas.py``, if present);
+    row values are strings either way.
+    """
+    schema = schema if schema is not None else load_schema(data_dir)
+    for path in sorted(glob.glob(os.path.join(data_dir, pattern))):
+        source = os.path.basename(path)
+        df = pd.read_csv(path, keep_default_na=False, **read_csv_kwargs(schema, path, strings_only=True))
+        seen: Dict[str, int] = {}
+        for row in df.to_dict('records'):
+            key = f"{source}|{row_key(row)}"
+            occurrence = seen.get(key, 0)
+            seen[key] = occurrence + 1
+            if occurrence:
+                key = f"{key}#{occurrence}"
+            yield hashlib.md5(key.encode('utf-8')).hexdigest(), source, row
+
+
+def row_to_document(doc_id: str, source: str, row: Dict[str, str]) -> Dict:
+    """Create a searchable skill document from a TSC_CCS source row"""
+    code = next((row[col] for col in CODE_COLUMNS if col in row), '')
+    lines = [
+        f"Skill: {row.get('TSC_CCS Title', '')}",
+        f"Category: {row.get('TSC_CCS Category', '')}",
+        f"Sector: {row.get('Sector', '')}"
+    ]
+    if row.get(PROFICIENCY_COLUMN):
+        lines.append(f"Proficiency Level: {row[PROFICIENCY_COLUMN]}")
+        lines.append(f"Proficiency Description: {row.get('Proficiency Description', '')}")
+    if row.get(ITEM_COLUMN):
+        classification = row.get('Knowledge / Ability Classification', 'item')
+        lines.append(f"{classification.capitalize()}: {row[ITEM_COLUMN]}")
+    else:
+        lines.append(f"Description: {row.get('TSC_CCS Description', '')}")
+
+    return {
+        'id': doc_id,
+        'type': 'skill',
+        'title': row.get('TSC_CCS Title', ''),
+        'category': row.get('TSC_CCS Category', ''),
+        'content': '\n'.join(lines),
+        'metadata': {
+            'tsc_code': code,
+            'sector': row.get('Sector', ''),
+            'category': row.get('TSC_CCS Category', ''),
+            'proficiency': row.get(PROFICIENCY_COLUMN, ''),
+            'classification': row.get('Knowledge / Ability Classification', ''),
+            'source': source
+        }
+    }
+
+
+class IndexManifest:
+    """Row keys and fingerprints of the currently indexed bundle"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rows: Dict[str, Dict[str, str]] = {}
+        self.tombstones: Dict[str, str] = {}
+        self.updated_at: Optional[str] = None
+
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != MANIFEST_VERSION:
+                raise ValueError(f"Unsupported manifest version in {path}: {data.get('version')}")
+            self.rows = data['rows']
+            self.tombstones = data.get('tombstones', {})
+            self.updated_at = data.get('updated_at')
+
+    def save(self):
+        """Write the manifest atomically"""
+        self.updated_at = datetime.now().isoformat()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': MANIFEST_VERSION,
+                'updated_at': self.updated_at,
+                'rows': self.rows,
+                'tombstones': self.tombstones
+            }, f)
+        os.replace(tmp_path, self.path)
+
+
+class IncrementalIndexRefresher:
+    """Apply row-level diffs of new CSV drops to the vector, keyword and metadata indexes
+
+    The keyword and metadata indexes are held in memory, so they must
+    already reflect the bundle recorded in the manifest; pass ``None``
+    for either to leave it untouched.
+    """
+
+    def __init__(self, vector_store, embedding_generator, keyword_index=None,
+                 metadata_index=None, manifest_path: str = "./data/chroma_db/manifest.json",
+                 collection_name: str = "skills", source_pattern: str = 'jobsandskills-*.csv',
+                 batch_size: int = 1000):
+        self.vector_store = vector_store
+        self.embedding_generator = embedding_generator
+        self.keyword_index = keyword_index
+        self.metadata_index = metadata_index
+        self.manifest = IndexManifest(manifest_path)
+        self.collection_name = collection_name
+        self.source_pattern = source_pattern
+        self.batch_size = batch_size
+
+    def diff(self, data_dir: str) -> Dict:
+        """Compare the files in ``data_dir`` against the manifest"""
+        inserted, updated = [], []
+        fingerprints = {}
+        for doc_id, source, row in iter_source_rows(data_dir, self.source_pattern):
+            fingerprint = fingerprint_row(row)
+            fingerprints[doc_id] = {'fingerprint': fingerprint, 'source': source}
+            previous = self.manifest.rows.get(doc_id)
+            if previous is None:
+                inserted.append(row_to_document(doc_id, source, row))
+            elif previous['fingerprint'] != fingerprint:
+                updated.append(row_to_document(doc_id, source, row))
+
+        deleted = [doc_id for doc_id in self.manifest.rows if doc_id not in fingerprints]
+        return {
+            'inserted': inserted,
+            'updated': updated,
+            'deleted': deleted,
+            'unchanged': len(fingerprints) - len(inserted) - len(updated),
+            'fingerprints': fingerprints
+        }
+
+    def refresh(self, data_dir: str, dry_run: bool = False) -> Dict:
+        """Refresh all indexes from ``data_dir`` and report what changed"""
+        timings = {}
+
+        start = time.perf_counter()
+        changes = self.diff(data_dir)
+        timings['diff'] = time.perf_counter() - start
+
+        upserts = changes['inserted'] + changes['updated']
+        deleted = changes['deleted']
+        report = {
+            'inserted': len(changes['inserted']),
+            'updated': len(changes['updated']),
+            'deleted': len(deleted),
+            'unchanged': changes['unchanged'],
+            'total': len(changes['fingerprints']),
+            'dry_run': dry_run,
+            'timings': timings
+        }
+        report['changed_fraction'] = (
+            (len(upserts) + len(deleted)) / max(report['total'] + len(deleted), 1)
+        )
+        if dry_run:
+            return report
+
+        start = time.perf_counter()
+        embeddings = self.embedding_generator.generate_embeddings(upserts) if upserts else {}
+        timings['embed'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self._apply_vector_changes(upserts, embeddings, deleted)
+        timings['vector'] = time.perf_counter() - start
+
+        for stage, index in (('keyword', self.keyword_index), ('metadata', self.metadata_index)):
+            if index is None:
+                continue
+            start = time.perf_counter()
+            if deleted:
+                index.delete(deleted)
+            if upserts:
+                index.upsert(upserts)
+            timings[stage] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        now = datetime.now().isoformat()
+        for doc_id in deleted:
+            del self.manifest.rows[doc_id]
+            self.manifest.tombstones[doc_id] = now
+        for doc in upserts:
+            self.manifest.rows[doc['id']] = changes['fingerprints'][doc['id']]
+            self.manifest.tombstones.pop(doc['id'], None)
+        self.manifest.save()
+        timings['manifest'] = time.perf_counter() - start
+
+        metrics.set_index_size('manifest', len(self.manifest.rows))
+        for name, index in (('keyword', self.keyword_index), ('metadata', self.metadata_index)):
+            if index is not None:
+                metrics.set_index_size(name, len(index))
+
+        return report
+
+    def _apply_vector_changes(self, upserts: List[Dict], embeddings: Dict, deleted: List[str]):
+        if not upserts and not deleted:
+            return
+
+        collection = self.vector_store.client.get_collection(self.collection_name)
+        for i in range(0, len(deleted), self.batch_size):
+            collection.delete(ids=deleted[i:i + self.batch_size])
+
+        for i in range(0, len(upserts), self.batch_size):
+            batch = upserts[i:i + self.batch_size]
+            collection.upsert(
+                ids=[doc['id'] for doc in batch],
+                embeddings=[embeddings[doc['id']].tolist() for doc in batch],
+                metadatas=[doc['metadata'] for doc in batch],
+                documents=[doc['content'] for doc in batch]
+            )
+
+
+def format_refresh_report(report: Dict) -> str:
+    """Render a refresh report as a short human-readable summary"""
+    lines = [
+        f"Rows: {report['total']} "
+        f"(+{report['inserted']} inserted, ~{report['updated']} updated, "
+        f"-{report['deleted']} deleted, {report['unchanged']} unchanged; "
+        f"{report['changed_fraction']:.1%} changed)"
+    ]
+    for stage, seconds in report['timings'].items():
+        lines.append(f"  {stage:<10} {seconds * 1000:9.1f} ms")
+    return '\n'.join(lines)
@@ -0,0 +1,191 @@
+"""
+In-memory keyword and metadata indexes for the skills corpus.
+
+Both indexes accept incremental upserts and tombstone deletes so that
+an index refresh only touches the documents that actually changed.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case alphanumeric tokenization shared by indexing and querying"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class KeywordIndex:
+    """BM25 inverted index with tombstone deletes"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_terms: Dict[str, Counter] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.tombstones: Set[str] = set()
+        self._total_length = 0
+        # Per-term BM25 weight arrays over the live documents, rebuilt lazily
+        # after any write so that a query is a handful of vector adds
+        self._snapshot: Optional[Tuple[List[str], Dict[str, int], Dict]] = None
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths) - len(self.tombstones)
+
+    def upsert(self, documents: List[Dict]):
+        """Insert new documents or replace existing ones"""
+        self._snapshot = None
+        for doc in documents:
+            doc_id = doc['id']
+            if doc_id in self.doc_terms:
+                self._purge(doc_id)
+
+            terms = Counter(tokenize(doc['content']))
+            self.doc_terms[doc_id] = terms
+            self.doc_lengths[doc_id] = sum(terms.values())
+            self._total_length += self.doc_lengths[doc_id]
+            for term, tf in terms.items():
+                self.postings.setdefault(term, {})[doc_id] = tf
+
+    def delete(self, doc_ids: Iterable[str]):
+        """Tombstone documents; postings are reclaimed by ``compact``"""
+        self._snapshot = None
+        for doc_id in doc_ids:
+            if doc_id in self.doc_lengths and doc_id not in self.tombstones:
+                self.tombstones.add(doc_id)
+                self._total_length -= self.doc_lengths[doc_id]
+
+    def compact(self):
+        """Physically remove tombstoned documents from the postings"""
+        self._snapshot = None
+        for doc_id in list(self.tombstones):
+            self._purge(doc_id)
+
+    def search(self, query: str, top_k: int = 10) -> List[Dict]:
+        """Return the ``top_k`` live documents ranked by BM25"""
+        if len(self) == 0:
+            return []
+
+        live_ids, rows, cache = self._live_snapshot()
+        scores = np.zeros(len(live_ids))
+        for term in set(tokenize(query)):
+            weights = self._term_weights(term, rows, cache)
+            if weights is not None:
+                indexes, values = weights
+                scores[indexes] += values
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > top_k:
+            matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+        ranked = matched[np.lexsort((matched, -scores[matched]))]
+        return [{'id': live_ids[i], 'score': float(scores[i])} for i in ranked]
+
+    def _live_snapshot(self) -> Tuple[List[str], Dict[str, int], Dict]:
+        snapshot = self._snapshot
+        if snapshot is None:
+            live_ids = [doc_id for doc_id in self.doc_lengths if doc_id not in self.tombstones]
+            snapshot = (live_ids, {doc_id: i for i, doc_id in enumerate(live_ids)}, {})
+            self._snapshot = snapshot
+        return snapshot
+
+    def _term_weights(self, term: str, rows: Dict[str, int],
+                      cache: Dict) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Row indexes and BM25 contributions of ``term``, cached until the next write"""
+        if term in cache:
+            return cache[term]
+
+        weights = None
+        postings = self.postings.get(term)
+        if postings:
+            live = [(rows[doc_id], tf, self.doc_lengths[doc_id])
+                    for doc_id, tf in postings.items() if doc_id not in self.tombstones]
+            if live:
+                n_docs, df = len(rows), len(live)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                indexes, tf, lengths = (np.array(column) for column in zip(*live))
+                norm = self.k1 * (1 - self.b + self.b * lengths / (self._total_length / n_docs))
+                weights = (indexes, idf * tf * (self.k1 + 1) / (tf + norm))
+        cache[term] = weights
+        return weights
+
+    def _purge(self, doc_id: str):
+        for term in self.doc_terms.pop(doc_id):
+            postings = self.postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self.postings[term]
+        if doc_id in self.tombstones:
+            self.tombstones.discard(doc_id)
+        else:
+            self._total_length -= self.doc_lengths[doc_id]
+        del self.doc_lengths[doc_id]
+
+
+class MetadataIndex:
+    """Field/value postings over document metadata with tombstone deletes"""
+
+    def __init__(self, fields: Iterable[str] = ('tsc_code', 'sector', 'category', 'proficiency')):
+        self.fields = tuple(fields)
+        self.metadata: Dict[str, Dict] = {}
+        self.postings: Dict[str, Dict[str, Set[str]]] = {field: {} for field in self.fields}
+        self.tombstones: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self.metadata) - len(self.tombstones)
+
+    def upsert(self, documents: List[Dict]):
+        """Insert new documents or replace existing ones"""
+        for doc in documents:
+            doc_id = doc['id']
+            if doc_id in self.metadata:
+                self._purge(doc_id)
+
+            metadata = doc.get('metadata', {})
+            self.metadata[doc_id] = metadata
+            for field in self.fields:
+                if field in metadata:
+                    self.postings[field].setdefault(str(metadata[field]), set()).add(doc_id)
+
+    def delete(self, doc_ids: Iterable[str]):
+        """Tombstone documents; postings are reclaimed by ``compact``"""
+        for doc_id in doc_ids:
+            if doc_id in self.metadata:
+                self.tombstones.add(doc_id)
+
+    def compact(self):
+        """Physically remove tombstoned documents from the postings"""
+        for doc_id in list(self.tombstones):
+            self._purge(doc_id)
+
+    def get(self, doc_id: str) -> Dict:
+        """Return metadata for a live document, or an empty dict"""
+        if doc_id in self.tombstones:
+            return {}
+        return self.metadata.get(doc_id, {})
+
+    def filter(self, **criteria) -> Set[str]:
+        """Return ids of live documents matching every ``field=value`` pair"""
+        matched = None
+        for field, value in criteria.items():
+            ids = self.postings.get(field, {}).get(str(value), set())
+            matched = set(ids) if matched is None else matched & ids
+        if matched is None:
+            matched = set(self.metadata)
+        return matched - self.tombstones
+
+    def _purge(self, doc_id: str):
+        metadata = self.metadata.pop(doc_id)
+        for field in self.fields:
+            if field in metadata:
+                ids = self.postings[field].get(str(metadata[field]))
+                if ids is not None:
+                    ids.discard(doc_id)
+                    if not ids:
+                        del self.postings[field][str(metadata[field])]
+        self.tombstones.discard(doc_id)
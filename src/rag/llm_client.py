@@ -0,0 +1,381 @@
+"""
+Pooled chat completion client for OpenAI-compatible endpoints.
+
+Replaces per-call ``openai.ChatCompletion.create`` with one shared
+client that keeps connections alive, caps concurrent upstream calls,
+collapses identical in-flight prompts into a single upstream call
+(single-flight), spends retries from a client-wide budget instead of
+retrying every call blindly, and reports tokens and latency per call.
+
+    client = LLMClient.from_config(config['llm'], api_key=os.environ['OPENAI_API_KEY'])
+    result = client.chat([{'role': 'user', 'content': 'Hello'}])
+    result['content'], result['usage'], result['latency']
+"""
+
+import hashlib
+import http.client
+import json
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .metrics import metrics
+
+RETRYABLE_STATUS = (408, 409, 429, 500, 502, 503, 504)
+
+# A keep-alive connection the server has already closed fails with one of
+# these on first use; the request never reached the server, so resending
+# it on a fresh connection does not count as a retry
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+_NO_USAGE = {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+
+
+class LLMError(Exception):
+    """A chat completion call failed"""
+
+    def __init__(self, message: str, status: Optional[int] = None, retryable: bool = False,
+                 retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class RetryBudget:
+    """Client-wide allowance of retries, earned as a fraction of calls
+
+    Every call deposits ``ratio`` tokens (up to ``reserve``) and every
+    retry spends one. Sustained retries are therefore capped at ``ratio``
+    per call, so an upstream outage fails fast instead of tripling the
+    load on it.
+    """
+
+    def __init__(self, ratio: float = 0.1, reserve: float = 10.0):
+        self.ratio = ratio
+        self.reserve = reserve
+        self._balance = reserve
+        self._lock = threading.Lock()
+
+    @property
+    def balance(self) -> float:
+        return self._balance
+
+    def deposit(self):
+        """Credit the budget for one call"""
+        with self._lock:
+            self._balance = min(self._balance + self.ratio, self.reserve)
+
+    def withdraw(self) -> bool:
+        """Spend one retry if the budget allows it"""
+        with self._lock:
+            if self._balance < 1:
+                return False
+            self._balance -= 1
+            return True
+
+
+class ConnectionPool:
+    """Keep-alive connections to one host, reused most-recent-first"""
+
+    def __init__(self, base_url: str, max_idle: int = 8, timeout: float = 60.0):
+        parsed = urlsplit(base_url)
+        self.connection_class = (http.client.HTTPSConnection if parsed.scheme == 'https'
+                                 else http.client.HTTPConnection)
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.path = parsed.path.rstrip('/')
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.created = 0
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """Return an idle connection or a new one, and whether it was reused"""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+            self.created += 1
+        return self.connection_class(self.host, self.port, timeout=self.timeout), False
+
+    def release(self, connection: http.client.HTTPConnection):
+        """Return a connection whose response has been fully read"""
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+class LLMClient:
+    """Chat completions with pooling, a concurrency cap and single-flight"""
+
+    def __init__(self, base_url: str = 'https://api.openai.com/v1', api_key: Optional[str] = None,
+                 model: str = 'gpt-3.5-turbo', max_connections: int = 8, max_concurrency: int = 8,
+                 timeout: float = 60.0, max_attempts: int = 3, retry_budget: Optional[RetryBudget] = None,
+                 backoff_seconds: float = 0.5, max_backoff_seconds: float = 8.0,
+                 single_flight: bool = True, default_params: Optional[Dict] = None):
+        self.api_key = api_key
+        self.model = model
+        self.pool = ConnectionPool(base_url, max_connections, timeout)
+        self.max_attempts = max_attempts
+        self.retry_budget = retry_budget or RetryBudget()
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.single_flight = single_flight
+        self.default_params = default_params or {}
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'calls': 0, 'upstream_calls': 0, 'shared': 0, 'retries': 0, 'retries_denied': 0,
+            'failures': 0, 'prompt_tokens': 0, 'completion_tokens': 0
+        }
+
+    @classmethod
+    def from_config(cls, config: Dict, api_key: Optional[str] = None, **kwargs) -> 'LLMClient':
+        """Build a client from the ``llm`` section of rag_config.yaml"""
+        client = config.get('client', {})
+        retry = client.get('retry', {})
+        params = {key: config[key] for key in ('temperature', 'max_tokens', 'top_p',
+                                               'frequency_penalty', 'presence_penalty') if key in config}
+        options = dict(
+            base_url=config.get('base_url', 'https://api.openai.com/v1'),
+            api_key=api_key,
+            model=config.get('model', 'gpt-3.5-turbo'),
+            max_connections=client.get('max_connections', 8),
+            max_concurrency=client.get('max_concurrency', 8),
+            timeout=client.get('timeout', 60.0),
+            max_attempts=retry.get('max_attempts', 3),
+            retry_budget=RetryBudget(retry.get('budget_ratio', 0.1), retry.get('budget_reserve', 10.0)),
+            backoff_seconds=retry.get('backoff_seconds', 0.5),
+            max_backoff_seconds=retry.get('max_backoff_seconds', 8.0),
+            single_flight=client.get('single_flight', True),
+            default_params=params
+        )
+        options.update(kwargs)
+        return cls(**options)
+
+    @property
+    def stats(self) -> Dict:
+        """Counters since the client was created"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['connections_created'] = self.pool.created
+        return stats
+
+    def close(self):
+        self.pool.close()
+
+    def chat(self, messages: List[Dict], stream: bool = False, **params) -> Dict:
+        """Run one chat completion and return its content, usage and timings
+
+        Identical requests (same model, messages and parameters) that are
+        already in flight share the first caller's upstream call; their
+        results carry ``shared=True`` and zero ``usage``, so summing usage
+        over calls counts each upstream call once.
+        """
+        payload = {'model': self.model, **self.default_params, **params, 'messages': messages}
+        start = time.perf_counter()
+        self._count('calls')
+        if not self.single_flight:
+            return self._call_upstream(payload, stream)
+
+        key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+        with self._lock:
+            leader = self._in_flight.get(key)
+            if leader is None:
+                future = self._in_flight[key] = Future()
+        if leader is not None:
+            result = leader.result()
+            self._count('shared')
+            metrics.record_llm('shared')
+            return dict(result, shared=True, usage=dict(_NO_USAGE), latency=time.perf_counter() - start)
+
+        try:
+            result = self._call_upstream(payload, stream)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def _count(self, name: str, value: int = 1):
+        with self._lock:
+            self._stats[name] += value
+
+    def _call_upstream(self, payload: Dict, stream: bool) -> Dict:
+        self.retry_budget.deposit()
+        start = time.perf_counter()
+        queue_seconds = 0.0
+        attempt = 0
+        while True:
+            attempt += 1
+            queued = time.perf_counter()
+            with self._slots:
+                queue_seconds += time.perf_counter() - queued
+                try:
+                    result = self._request(payload, stream)
+                    break
+                except LLMError as e:
+                    error = e
+            if not error.retryable or attempt >= self.max_attempts:
+                self._count('failures')
+                metrics.record_llm('failed')
+                raise error
+            if not self.retry_budget.withdraw():
+                self._count('retries_denied')
+                self._count('failures')
+                metrics.record_llm('retry_denied')
+                raise error
+            self._count('retries')
+            metrics.record_llm('retry')
+            time.sleep(self._backoff(attempt, error.retry_after))
+
+        usage = result['usage']
+        with self._lock:
+            self._stats['upstream_calls'] += 1
+            self._stats['prompt_tokens'] += usage['prompt_tokens']
+            self._stats['completion_tokens'] += usage['completion_tokens']
+        metrics.record_llm('upstream', usage['prompt_tokens'], usage['completion_tokens'])
+        result.update(
+            latency=time.perf_counter() - start,
+            queue_seconds=queue_seconds,
+            attempts=attempt,
+            shared=False
+        )
+        metrics.observe('llm_time_to_first_token', result['time_to_first_token'])
+        metrics.observe('llm_total', result['latency'])
+        return result
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff_seconds)
+        delay = min(self.backoff_seconds * 2 ** (attempt - 1), self.max_backoff_seconds)
+        return delay * random.uniform(0.5, 1.0)
+
+    def _request(self, payload: Dict, stream: bool) -> Dict:
+        body = dict(payload, stream=stream)
+        if stream:
+            body['stream_options'] = {'include_usage': True}
+        data = json.dumps(body).encode('utf-8')
+        headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+        if self.api_key:
+            headers['Authorization'] = f"Bearer {self.api_key}"
+
+        connection, reused = self.pool.acquire()
+        start = time.perf_counter()
+        try:
+            try:
+                connection.request('POST', f"{self.pool.path}/chat/completions", data, headers)
+                response = connection.getresponse()
+            except _STALE_CONNECTION_ERRORS:
+                if not reused:
+                    raise
+                connection.close()
+                connection.request('POST', f"{self.pool.path}/chat/completions", data, headers)
+                response = connection.getresponse()
+
+            if response.status != 200:
+                detail = response.read()[:200].decode('utf-8', 'replace')
+                retry_after = response.getheader('Retry-After')
+                self._finish(connection, response)
+                raise LLMError(
+                    f"Upstream returned {response.status}: {detail}", status=response.status,
+                    retryable=response.status in RETRYABLE_STATUS,
+                    retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None
+                )
+
+            try:
+                result = self._read_stream(response, start) if stream else self._read_json(response, start)
+                result['upstream_queue_seconds'] = float(response.getheader('X-Queue-Time-Ms', 0.0)) / 1000
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                # The rest of the body is unknown, so the connection cannot be reused
+                connection.close()
+                raise LLMError(f"Malformed response from LLM: {e!r}", status=response.status) from e
+            self._finish(connection, response)
+        except (OSError, http.client.HTTPException) as e:
+            connection.close()
+            raise LLMError(f"Connection to LLM failed: {e!r}", retryable=True) from e
+
+        if result['usage'] is None:
+            result['usage'] = self._estimate_usage(payload['messages'], result['content'], result.pop('chunks'))
+            result['usage_estimated'] = True
+        else:
+            result.pop('chunks', None)
+            result['usage_estimated'] = False
+        return result
+
+    def _finish(self, connection: http.client.HTTPConnection, response: http.client.HTTPResponse):
+        if response.will_close:
+            connection.close()
+        else:
+            self.pool.release(connection)
+
+    @staticmethod
+    def _read_json(response: http.client.HTTPResponse, start: float) -> Dict:
+        payload = json.loads(response.read())
+        choice = payload['choices'][0]
+        elapsed = time.perf_counter() - start
+        return {
+            'content': choice['message']['content'],
+            'finish_reason': choice.get('finish_reason'),
+            'model': payload.get('model'),
+            'usage': payload.get('usage'),
+            'time_to_first_token': elapsed,
+            'chunks': 0
+        }
+
+    @staticmethod
+    def _read_stream(response: http.client.HTTPResponse, start: float) -> Dict:
+        parts, usage, model, finish_reason, first_token = [], None, None, None, None
+        for line in iter(response.readline, b''):
+            if not line.startswith(b'data: '):
+                continue
+            data = line[6:].strip()
+            if data == b'[DONE]':
+                break
+            chunk = json.loads(data)
+            model = chunk.get('model', model)
+            usage = chunk.get('usage') or usage
+            for choice in chunk.get('choices', []):
+                content = choice.get('delta', {}).get('content')
+                if content:
+                    if first_token is None:
+                        first_token = time.perf_counter() - start
+                    parts.append(content)
+                finish_reason = choice.get('finish_reason') or finish_reason
+        response.read()  # drain the terminating chunk so the connection can be reused
+        return {
+            'content': ''.join(parts),
+            'finish_reason': finish_reason,
+            'model': model,
+            'usage': usage,
+            'time_to_first_token': first_token if first_token is not None else time.perf_counter() - start,
+            'chunks': len(parts)
+        }
+
+    @staticmethod
+    def _estimate_usage(messages: List[Dict], content: str, chunks: int) -> Dict:
+        """Rough usage when the response carries none: ~4 characters per token"""
+        prompt_tokens = sum(len(str(message.get('content', ''))) for message in messages) // 4
+        # Streams send about one token per chunk
+        completion_tokens = chunks or len(content) // 4
+        return {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens
+        }
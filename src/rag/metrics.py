@@ -0,0 +1,246 @@
+"""
+Per-stage latency histograms, cache and index metrics for the RAG pipeline.
+
+Stage latencies go into fixed-bucket Prometheus histograms through a
+slotted timer that costs two ``perf_counter`` calls and one observe.
+``PipelineMetrics.serve`` exposes them on a local HTTP endpoint, and a
+``RequestTrace`` emits one structured JSON log line per request.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+
+import structlog
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    start_http_server
+)
+
+STAGES = (
+    'query_processing',
+    'embedding',
+    'semantic_search',
+    'keyword_search',
+    'fusion',
+    'follow_up_rescore',
+    'context_build',
+    'llm_time_to_first_token',
+    'llm_total'
+)
+
+# Seconds; fine-grained at the low end where the retrieval stages live
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+
+class StageTimer:
+    """Context manager that observes elapsed time into a histogram child"""
+
+    __slots__ = ('_histogram', '_sink', '_name', '_start')
+
+    def __init__(self, histogram, sink: Optional[Dict[str, float]] = None, name: str = ''):
+        self._histogram = histogram
+        self._sink = sink
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._start
+        self._histogram.observe(elapsed)
+        if self._sink is not None:
+            self._sink[self._name] = self._sink.get(self._name, 0.0) + elapsed
+        return False
+
+
+class PipelineMetrics:
+    """Prometheus instruments shared by every stage of the pipeline"""
+
+    def __init__(self, registry: Optional[CollectorRegistry] = None):
+        self.registry = registry if registry is not None else CollectorRegistry()
+        self.stage_seconds = Histogram(
+            'rag_stage_seconds', 'Latency of each RAG pipeline stage',
+            ['stage'], buckets=LATENCY_BUCKETS, registry=self.registry
+        )
+        self.request_seconds = Histogram(
+            'rag_request_seconds', 'End-to-end latency of a RAG request',
+            buckets=LATENCY_BUCKETS, registry=self.registry
+        )
+        self.request_errors = Counter(
+            'rag_request_errors', 'RAG requests that raised', registry=self.registry
+        )
+        self.cache_requests = Counter(
+            'rag_cache_requests', 'Cache lookups by outcome',
+            ['cache', 'result'], registry=self.registry
+        )
+        self.cache_hit_ratio = Gauge(
+            'rag_cache_hit_ratio', 'Fraction of cache lookups that hit',
+            ['cache'], registry=self.registry
+        )
+        self.index_documents = Gauge(
+            'rag_index_documents', 'Live documents per index',
+            ['index'], registry=self.registry
+        )
+        self.llm_requests = Counter(
+            'rag_llm_requests', 'LLM client calls by outcome (upstream, shared, retry, retry_denied, failed)',
+            ['outcome'], registry=self.registry
+        )
+        self.llm_tokens = Counter(
+            'rag_llm_tokens', 'Tokens billed by the LLM provider',
+            ['kind'], registry=self.registry
+        )
+        # Resolve label children once so the hot path skips the label lookup
+        self._stages = {stage: self.stage_seconds.labels(stage=stage) for stage in STAGES}
+        self._cache_counts: Dict[str, list] = {}
+        self._cache_lock = threading.Lock()
+        self._server = None
+
+    def _stage_child(self, stage: str):
+        child = self._stages.get(stage)
+        if child is None:
+            child = self._stages[stage] = self.stage_seconds.labels(stage=stage)
+        return child
+
+    def stage(self, stage: str, sink: Optional[Dict[str, float]] = None) -> StageTimer:
+        """Time a block of code as ``stage``, also adding it to ``sink`` if given"""
+        return StageTimer(self._stage_child(stage), sink, stage)
+
+    def observe(self, stage: str, seconds: float):
+        """Record a latency measured elsewhere (e.g. time to first token)"""
+        self._stage_child(stage).observe(seconds)
+
+    def record_cache(self, cache: str, hit: bool):
+        """Count a cache lookup and update its hit ratio"""
+        self.cache_requests.labels(cache=cache, result='hit' if hit else 'miss').inc()
+        with self._cache_lock:
+            counts = self._cache_counts.setdefault(cache, [0, 0])
+            counts[0] += int(hit)
+            counts[1] += 1
+            ratio = counts[0] / counts[1]
+        self.cache_hit_ratio.labels(cache=cache).set(ratio)
+
+    def record_llm(self, outcome: str, prompt_tokens: int = 0, completion_tokens: int = 0):
+        """Count an LLM client event and the tokens it consumed"""
+        self.llm_requests.labels(outcome=outcome).inc()
+        if prompt_tokens:
+            self.llm_tokens.labels(kind='prompt').inc(prompt_tokens)
+        if completion_tokens:
+            self.llm_tokens.labels(kind='completion').inc(completion_tokens)
+
+    def set_index_size(self, index: str, documents: int):
+        """Report the number of live documents in an index"""
+        self.index_documents.labels(index=index).set(documents)
+
+    def trace(self, request_id: Optional[str] = None, **fields) -> 'RequestTrace':
+        """Start tracing a single request"""
+        return RequestTrace(self, request_id or uuid.uuid4().hex, fields)
+
+    def render(self) -> bytes:
+        """Prometheus text exposition of every metric in the registry"""
+        return generate_latest(self.registry)
+
+    def serve(self, port: int = 9090, addr: str = '127.0.0.1'):
+        """Expose ``/metrics`` on a local HTTP endpoint (idempotent)"""
+        if self._server is None:
+            self._server = start_http_server(port, addr=addr, registry=self.registry)
+        return self._server
+
+
+class RequestTrace:
+    """Per-request stage timings, emitted as one JSON log line on finish"""
+
+    def __init__(self, pipeline_metrics: PipelineMetrics, request_id: str, fields: Dict):
+        self.metrics = pipeline_metrics
+        self.request_id = request_id
+        self.fields = dict(fields)
+        self.stages: Dict[str, float] = {}
+        self._start = time.perf_counter()
+        self._finished = False
+
+    def stage(self, stage: str) -> StageTimer:
+        """Time a block of code as ``stage`` for this request"""
+        return self.metrics.stage(stage, self.stages)
+
+    def observe(self, stage: str, seconds: float):
+        """Record a latency measured elsewhere for this request"""
+        self.metrics.observe(stage, seconds)
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def add_stages(self, stages: Dict[str, float]):
+        """Attach timings already recorded in the histograms (e.g. by a shared batch)"""
+        for stage, seconds in stages.items():
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def annotate(self, **fields):
+        """Attach extra fields (intent, result counts, ...) to the log line"""
+        self.fields.update(fields)
+
+    def finish(self, error: Optional[BaseException] = None):
+        """Record the request latency and emit the structured log line"""
+        if self._finished:
+            return
+        self._finished = True
+        total = time.perf_counter() - self._start
+        self.metrics.request_seconds.observe(total)
+
+        log = structlog.get_logger(__name__)
+        event = dict(
+            request_id=self.request_id,
+            total_ms=round(total * 1000, 3),
+            stages_ms={stage: round(seconds * 1000, 3) for stage, seconds in self.stages.items()},
+            **self.fields
+        )
+        if error is not None:
+            self.metrics.request_errors.inc()
+            log.error('rag_request', error=repr(error), **event)
+        else:
+            log.info('rag_request', **event)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(exc)
+        return False
+
+
+def configure_logging(level: str = 'INFO', fmt: str = 'json'):
+    """Configure structlog for JSON (or console) output at ``level``"""
+    renderer = structlog.processors.JSONRenderer() if fmt == 'json' else structlog.dev.ConsoleRenderer()
+    structlog.configure(
+        processors=[
+            structlog.processors.add_log_level,
+            structlog.processors.TimeStamper(fmt='iso'),
+            renderer
+        ],
+        wrapper_class=structlog.make_filtering_bound_logger(getattr(logging, level.upper())),
+        cache_logger_on_first_use=True
+    )
+
+
+# Process-wide instruments, registered with the default Prometheus registry
+metrics = PipelineMetrics(REGISTRY)
+
+
+def setup_monitoring(config: Dict) -> PipelineMetrics:
+    """Apply the ``monitoring`` section of rag_config.yaml"""
+    monitoring = config.get('monitoring', {})
+    logging_config = monitoring.get('logging', {})
+    configure_logging(logging_config.get('level', 'INFO'), logging_config.get('format', 'json'))
+
+    metrics_config = monitoring.get('metrics', {})
+    if metrics_config.get('enabled', False):
+        metrics.serve(metrics_config.get('port', 9090), metrics_config.get('host', '127.0.0.1'))
+    return metrics
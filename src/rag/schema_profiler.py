@@ -0,0 +1,296 @@
+"""
+Schema profiling for the skills CSV drops.
+
+Discovers source files by glob and profiles them in one streaming pass
+each, on a thread pool across files: inferred dtype, null rate,
+cardinality, string-length stats and whether a column should be loaded
+as categorical. Files are parsed with pyarrow's multithreaded CSV reader
+when it is installed, otherwise with pandas in chunks. Past
+``sample_rows`` rows only every ``sample_every``-th chunk is profiled,
+so very large drops stay cheap; row counts are always exact.
+
+The result is written next to the data as ``schema.json``, and
+``read_csv_kwargs`` turns it into ``pd.read_csv`` arguments so loaders
+get the encoding and dtypes up front:
+
+    python analyze_schemas.py                  # profile data/, write data/schema.json
+    python analyze_schemas.py --no-write -v    # just print the report
+"""
+
+import argparse
+import csv
+import glob
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    _DECODE_ERRORS = (UnicodeDecodeError, pa.ArrowInvalid)
+except ImportError:  # pandas chunked reader only
+    pa = pa_csv = None
+    _DECODE_ERRORS = (UnicodeDecodeError,)
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+SCHEMA_FILENAME = 'schema.json'
+DEFAULT_PATTERN = 'jobsandskills-*.csv'
+ENCODINGS = ('utf-8-sig', 'latin-1')
+
+
+class ColumnProfile:
+    """Running statistics for one column, updated a chunk at a time"""
+
+    def __init__(self, name: str, max_distinct: int = 100000, samples: int = 5):
+        self.name = name
+        self.max_distinct = max_distinct
+        self.samples = samples
+        self.rows = 0
+        self.nulls = 0
+        self.values: Optional[set] = set()  # None once more than max_distinct values are seen
+        self.sample_values: List[str] = []
+        self.numeric = True
+        self.integral = True
+        self.min_length: Optional[int] = None
+        self.max_length = 0
+        self.total_length = 0
+
+    def update(self, column: pd.Series):
+        present = column[column != '']
+        self.rows += len(column)
+        self.nulls += len(column) - len(present)
+        if present.empty:
+            return
+
+        lengths = present.str.len()
+        self.min_length = min(int(lengths.min()), self.min_length if self.min_length is not None else 1 << 62)
+        self.max_length = max(int(lengths.max()), self.max_length)
+        self.total_length += int(lengths.sum())
+
+        if self.numeric:
+            # Text columns drop out on their first chunk
+            numbers = pd.to_numeric(present, errors='coerce')
+            if numbers.isna().any():
+                self.numeric = self.integral = False
+            elif self.integral:
+                self.integral = bool((numbers % 1 == 0).all())
+
+        if self.values is not None:
+            distinct = present.unique()
+            for value in distinct[:self.samples - len(self.sample_values)]:
+                if value not in self.values:
+                    self.sample_values.append(value)
+            self.values.update(distinct)
+            if len(self.values) > self.max_distinct:
+                self.values = None
+
+    def to_dict(self, max_categories: int = 1000, categorical_ratio: float = 0.5) -> Dict:
+        present = self.rows - self.nulls
+        if present and self.numeric:
+            dtype = ('int64' if not self.nulls else 'Int64') if self.integral else 'float64'
+        else:
+            dtype = 'string'
+        distinct = len(self.values) if self.values is not None else None
+        categorical = (
+            dtype == 'string' and distinct is not None and present > 0
+            and distinct <= max_categories and distinct <= categorical_ratio * present
+        )
+        return {
+            'dtype': dtype,
+            'categorical': categorical,
+            'null_rate': self.nulls / self.rows if self.rows else 0.0,
+            'distinct': distinct if distinct is not None else self.max_distinct,
+            'distinct_exact': distinct is not None,
+            'length': {
+                'min': self.min_length or 0,
+                'max': self.max_length,
+                'mean': self.total_length / present if present else 0.0
+            },
+            'samples': self.sample_values
+        }
+
+
+def _pandas_chunks(path: str, encoding: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    yield from pd.read_csv(path, dtype=str, keep_default_na=False, encoding=encoding,
+                           chunksize=chunk_rows)
+
+
+def _arrow_chunks(path: str, encoding: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    with open(path, 'r', encoding=encoding, newline='') as f:
+        names = next(csv.reader(f), [])
+    # Arrow skips a UTF-8 BOM itself; block_size assumes ~256 bytes per row
+    reader = pa_csv.open_csv(
+        path,
+        read_options=pa_csv.ReadOptions(use_threads=True, block_size=max(chunk_rows * 256, 1 << 20),
+                                        encoding='utf8' if encoding.startswith('utf-8') else encoding),
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(column_types={name: pa.string() for name in names},
+                                              strings_can_be_null=False,
+                                              quoted_strings_can_be_null=False)
+    )
+    # Blocks are sized in bytes; re-slice them so sampling counts rows
+    # the same way as the pandas reader
+    for batch in reader:
+        for offset in range(0, batch.num_rows, chunk_rows):
+            yield batch.slice(offset, chunk_rows).to_pandas()
+
+
+def profile_file(path: str, engine: str = 'auto', chunk_rows: int = 50000,
+                 sample_rows: Optional[int] = 200000, sample_every: int = 10,
+                 max_distinct: int = 100000, max_categories: int = 1000,
+                 categorical_ratio: float = 0.5) -> Dict:
+    """Profile one CSV file in a single pass"""
+    if engine == 'auto':
+        engine = 'arrow' if pa_csv is not None else 'pandas'
+    chunks = _arrow_chunks if engine == 'arrow' else _pandas_chunks
+    start = time.perf_counter()
+
+    for encoding in ENCODINGS:
+        columns: Dict[str, ColumnProfile] = {}
+        rows = profiled_rows = 0
+        try:
+            for index, chunk in enumerate(chunks(path, encoding, chunk_rows)):
+                rows += len(chunk)
+                if sample_rows and profiled_rows >= sample_rows and index % sample_every:
+                    continue
+                profiled_rows += len(chunk)
+                for name in chunk.columns:
+                    if name not in columns:
+                        columns[name] = ColumnProfile(name, max_distinct)
+                    columns[name].update(chunk[name])
+            break
+        except _DECODE_ERRORS as e:
+            logger.info("%s is not %s (%s), retrying", os.path.basename(path), encoding, e)
+    else:
+        raise ValueError(f"Could not decode {path} as any of {', '.join(ENCODINGS)}")
+
+    return {
+        'size': os.path.getsize(path),
+        'encoding': encoding,
+        'engine': engine,
+        'rows': rows,
+        'profiled_rows': profiled_rows,
+        'sampled': profiled_rows < rows,
+        'seconds': time.perf_counter() - start,
+        'columns': {name: column.to_dict(max_categories, categorical_ratio)
+                    for name, column in columns.items()}
+    }
+
+
+def profile_directory(data_dir: str = 'data', pattern: str = DEFAULT_PATTERN,
+                      workers: Optional[int] = None, **options) -> Dict:
+    """Profile every file matching ``pattern`` in ``data_dir``, one thread per file"""
+    paths = sorted(glob.glob(os.path.join(data_dir, pattern)))
+    workers = workers or min(len(paths), os.cpu_count() or 1) or 1
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='schema-profiler') as pool:
+        profiles = list(pool.map(lambda path: profile_file(path, **options), paths))
+    return {
+        'version': SCHEMA_VERSION,
+        'generated_at': datetime.now().isoformat(),
+        'pattern': pattern,
+        'files': {os.path.basename(path): profile for path, profile in zip(paths, profiles)}
+    }
+
+
+def write_schema(schema: Dict, path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(schema, f, indent=2, ensure_ascii=False)
+
+
+def load_schema(path: str) -> Optional[Dict]:
+    """The schema at ``path`` (or ``path/schema.json``), or None if there is none"""
+    if os.path.isdir(path):
+        path = os.path.join(path, SCHEMA_FILENAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        schema = json.load(f)
+    if schema.get('version') != SCHEMA_VERSION:
+        logger.warning("Ignoring %s: schema version %s, expected %s", path, schema.get('version'), SCHEMA_VERSION)
+        return None
+    return schema
+
+
+def read_csv_kwargs(schema: Optional[Dict], path: str, strings_only: bool = False) -> Dict:
+    """``pd.read_csv`` keyword arguments for ``path`` from a profiled schema
+
+    Categorical columns load as ``category``. With ``strings_only`` every
+    other column stays ``str``, for loaders that hash or format the raw
+    text. Numeric dtypes of a sampled file only describe the profiled
+    chunks, so those columns load as ``str`` too. Files missing from the
+    schema, or whose size has changed since they were profiled, fall
+    back to plain strings.
+    """
+    entry = (schema or {}).get('files', {}).get(os.path.basename(path))
+    if entry is None or entry.get('size') != os.path.getsize(path):
+        if entry is not None:
+            logger.info("%s changed since it was profiled; loading as strings", os.path.basename(path))
+        return {'dtype': str, 'encoding': ENCODINGS[0]}
+
+    dtypes = {}
+    for name, column in entry['columns'].items():
+        if column['categorical']:
+            dtypes[name] = 'category'
+        elif strings_only or entry['sampled'] or column['dtype'] == 'string':
+            dtypes[name] = str
+        else:
+            dtypes[name] = column['dtype']
+    return {'dtype': dtypes, 'encoding': entry['encoding']}
+
+
+def format_report(schema: Dict, verbose: bool = False) -> str:
+    lines = []
+    for name, profile in schema['files'].items():
+        sampled = f", profiled {profile['profiled_rows']}" if profile['sampled'] else ''
+        lines.append(f"{name}: {profile['rows']} rows x {len(profile['columns'])} columns "
+                     f"({profile['encoding']}, {profile['engine']}{sampled}, {profile['seconds']:.2f}s)")
+        for column_name, column in profile['columns'].items():
+            distinct = f"{column['distinct']}{'' if column['distinct_exact'] else '+'}"
+            dtype = 'category' if column['categorical'] else column['dtype']
+            length = column['length']
+            lines.append(f"  {column_name:<36} {dtype:<9} null {column['null_rate']:6.1%}  "
+                         f"distinct {distinct:>7}  len {length['min']}-{length['max']} "
+                         f"(mean {length['mean']:.0f})")
+            if verbose and column['samples']:
+                lines.append(f"    e.g. {column['samples']}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the CSV sources and write a schema for the loaders")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--pattern', default=DEFAULT_PATTERN)
+    parser.add_argument('--output', default=None, help=f"Defaults to <data-dir>/{SCHEMA_FILENAME}")
+    parser.add_argument('--no-write', action='store_true', help="Only print the report")
+    parser.add_argument('--engine', choices=['auto', 'arrow', 'pandas'], default='auto')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--sample-rows', type=int, default=200000,
+                        help="Profile every row up to this many, then every --sample-every-th chunk")
+    parser.add_argument('--sample-every', type=int, default=10)
+    parser.add_argument('-v', '--verbose', action='store_true', help="Show sample values")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    schema = profile_directory(args.data_dir, args.pattern, args.workers, engine=args.engine,
+                               sample_rows=args.sample_rows or None, sample_every=args.sample_every)
+    if not schema['files']:
+        parser.error(f"No files match {os.path.join(args.data_dir, args.pattern)}")
+    print(format_report(schema, args.verbose))
+    print(f"Profiled {len(schema['files'])} files in {time.perf_counter() - start:.2f}s")
+
+    if not args.no_write:
+        output = args.output or os.path.join(args.data_dir, SCHEMA_FILENAME)
+        write_schema(schema, output)
+        print(f"Schema written to {output}")
+
+
+if __name__ == "__main__":
+    main()
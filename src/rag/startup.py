@@ -0,0 +1,206 @@
+"""
+Cold-start instrumentation for the Streamlit app.
+
+``profiler.import_module`` times deferred imports the first time a page
+needs them, ``ModelPreloader`` loads the embedding model on a background
+thread, and ``python -m src.rag.startup`` measures the cold import cost
+of each module in a fresh interpreter against a budget.
+
+The startup report is logged after the first render and again once the
+background model load finishes. Streamlit only configures its own
+loggers, so unless the app sets up logging the report goes to stderr
+through a handler of its own.
+"""
+
+import argparse
+import importlib
+import logging
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Modules app.py imports, in the order a cold replica pays for them
+APP_MODULES = [
+    'streamlit',
+    'streamlit_option_menu',
+    'src.rag.startup',
+    'pandas',
+    'numpy',
+    'plotly.express',
+    'plotly.graph_objects',
+    'streamlit_extras.colored_header',
+    'streamlit_extras.metric_cards',
+    'src.rag.conversation_state',
+    'sentence_transformers'
+]
+
+
+class StartupProfiler:
+    """Record how long each deferred import and startup stage takes"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.timings: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._reported: set = set()
+
+    def import_module(self, name: str):
+        """Import ``name``, recording its cost the first time it is loaded"""
+        if name in sys.modules:
+            return sys.modules[name]
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        self._record(f"import {name}", time.perf_counter() - start)
+        return module
+
+    @contextmanager
+    def stage(self, label: str):
+        """Time an arbitrary startup stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(label, time.perf_counter() - start)
+
+    def report(self) -> Dict:
+        """Return recorded timings, slowest first"""
+        with self._lock:
+            timings = sorted(self.timings.items(), key=lambda item: item[1], reverse=True)
+        return {
+            'since_start': time.perf_counter() - self.started_at,
+            'timings': dict(timings)
+        }
+
+    def log_report_once(self, event: str = 'first render'):
+        """Log the report the first time ``event`` happens in this process"""
+        with self._lock:
+            if event in self._reported:
+                return
+            self._reported.add(event)
+        report = self.report()
+        _ensure_handler()
+        logger.info("Startup report (%s): %.1f ms since start; %s", event, report['since_start'] * 1000,
+                    ', '.join(f"{label}={seconds * 1000:.1f}ms"
+                              for label, seconds in report['timings'].items()))
+
+    def _record(self, label: str, seconds: float):
+        with self._lock:
+            self.timings[label] = self.timings.get(label, 0.0) + seconds
+
+
+def _ensure_handler():
+    """Give this logger a stderr handler if nothing else would show its INFO records"""
+    if logger.hasHandlers():
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    logger.addHandler(handler)
+    if logger.getEffectiveLevel() > logging.INFO:
+        logger.setLevel(logging.INFO)
+
+
+profiler = StartupProfiler()
+
+
+def load_embedding_model(model_name: str = 'all-MiniLM-L6-v2'):
+    """Import sentence-transformers and load ``model_name`` on CPU"""
+    sentence_transformers = profiler.import_module('sentence_transformers')
+    with profiler.stage(f"load model {model_name}"):
+        return sentence_transformers.SentenceTransformer(model_name, device='cpu')
+
+
+class ModelPreloader:
+    """Load a model on a daemon thread so page rendering is never blocked"""
+
+    def __init__(self, loader: Callable = load_embedding_model, *args, **kwargs):
+        self._model = None
+        self._error: Optional[BaseException] = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(loader,) + args, kwargs=kwargs,
+            name='model-preloader', daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, loader: Callable, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            self._model = loader(*args, **kwargs)
+            _ensure_handler()
+            logger.info("Background model load finished in %.1f ms",
+                        (time.perf_counter() - start) * 1000)
+            profiler.log_report_once('model loaded')
+        except BaseException as e:  # surfaced to the caller of result()
+            logger.warning("Background model load failed: %s", e)
+            self._error = e
+        finally:
+            self._done.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set() and self._error is None
+
+    def result(self, timeout: Optional[float] = None):
+        """Wait for the model and return it, re-raising any load error"""
+        if not self._done.wait(timeout):
+            raise TimeoutError("Model is still loading")
+        if self._error is not None:
+            raise self._error
+        return self._model
+
+
+def measure_cold_imports(modules: List[str]) -> Dict[str, Optional[float]]:
+    """Cumulative cold import time in seconds of each module in a fresh interpreter
+
+    Modules that fail to import are reported as ``None``.
+    """
+    timings = {}
+    for name in modules:
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f"import {name}"],
+            capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            timings[name] = None
+            continue
+        # Lines look like "import time:   self [us] |  cumulative | name"; the
+        # requested module is the last top-level entry for that name
+        cumulative = 0
+        for line in proc.stderr.splitlines():
+            parts = line.split('|')
+            if len(parts) == 3 and parts[2].strip() == name:
+                cumulative = int(parts[1].strip())
+        timings[name] = cumulative / 1e6
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import cost against a budget")
+    parser.add_argument('modules', nargs='*', default=APP_MODULES)
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help="Fail if the eagerly imported modules exceed this total")
+    parser.add_argument('--eager', nargs='*', default=APP_MODULES[:3],
+                        help="Modules app.py imports before the first page renders")
+    args = parser.parse_args()
+
+    timings = measure_cold_imports(args.modules)
+    for name, seconds in sorted(timings.items(), key=lambda item: item[1] or 0.0, reverse=True):
+        marker = '*' if name in args.eager else ' '
+        cost = f"{seconds * 1000:9.1f} ms" if seconds is not None else "  not installed"
+        print(f"{marker} {name:<36} {cost}")
+
+    # Each measurement includes shared dependencies, so the eager total is an upper bound
+    eager_total = sum(timings.get(name) or 0.0 for name in args.eager) * 1000
+    print(f"Eager imports (*): {eager_total:.1f} ms")
+    if args.budget_ms is not None and eager_total > args.budget_ms:
+        print(f"Over cold-start budget of {args.budget_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
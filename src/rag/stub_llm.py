@@ -0,0 +1,225 @@
+"""
+Local stub of an OpenAI-compatible chat completion endpoint.
+
+Used by load tests and client tests in place of the paid API. The stub
+simulates time to first token, per-token generation time, an optional
+upstream concurrency limit, and server-sent-event streaming. Every
+response carries an ``X-Queue-Time-Ms`` header with the time the request
+waited for a concurrency slot, and ``GET /stats`` returns request counters.
+
+    python -m src.rag.stub_llm --port 8001 --first-token-ms 300 --token-ms 10
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+COMPLETION_PATHS = ('/v1/chat/completions', '/chat/completions')
+
+
+class _Server(ThreadingHTTPServer):
+    # The default backlog of 5 drops connections under load-test bursts
+    request_queue_size = 256
+    daemon_threads = True
+
+
+class StubLLMServer:
+    """Threaded HTTP/1.1 server answering chat completions with canned text"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, first_token_ms: float = 200.0,
+                 token_ms: float = 5.0, completion_tokens: int = 60, jitter: float = 0.1,
+                 max_concurrency: int = 0, fail_rate: float = 0.0, seed: Optional[int] = None):
+        self.first_token_ms = first_token_ms
+        self.token_ms = token_ms
+        self.completion_tokens = completion_tokens
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'failed': 0, 'connections': 0, 'max_in_flight': 0}
+        self._in_flight = 0
+
+        self.httpd = _Server((host, port), self._make_handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> 'StubLLMServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='stub-llm', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def _delay(self, ms: float) -> float:
+        with self._lock:
+            factor = 1.0 + self._random.uniform(-self.jitter, self.jitter)
+        return max(ms * factor, 0.0) / 1000
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            return self.fail_rate > 0 and self._random.random() < self.fail_rate
+
+    def _track(self, delta: int):
+        with self._lock:
+            self._in_flight += delta
+            if delta > 0:
+                self.stats['requests'] += 1
+                self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self._in_flight)
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Keep-alive clients would otherwise wait on delayed ACKs between
+            # the header and body writes
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.stats['connections'] += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.rstrip('/') in ('/stats', '/v1/stats'):
+                    with server._lock:
+                        self._send_json(200, dict(server.stats))
+                else:
+                    self._send_json(404, {'error': {'message': f"Unknown path {self.path}"}})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length) or b'{}')
+                if self.path not in COMPLETION_PATHS:
+                    self._send_json(404, {'error': {'message': f"Unknown path {self.path}"}})
+                    return
+
+                queued = time.perf_counter()
+                if server._slots is not None:
+                    server._slots.acquire()
+                queue_ms = (time.perf_counter() - queued) * 1000
+                server._track(1)
+                try:
+                    if server._should_fail():
+                        with server._lock:
+                            server.stats['failed'] += 1
+                        self._send_json(503, {'error': {'message': 'stub overloaded'}}, queue_ms)
+                    elif body.get('stream'):
+                        self._stream(body, queue_ms)
+                    else:
+                        time.sleep(server._delay(server.first_token_ms)
+                                   + server._delay(server.token_ms) * server.completion_tokens)
+                        self._send_json(200, server.completion(body), queue_ms)
+                finally:
+                    server._track(-1)
+                    if server._slots is not None:
+                        server._slots.release()
+
+            def _send_json(self, status: int, payload: Dict, queue_ms: float = 0.0):
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.send_header('X-Queue-Time-Ms', f"{queue_ms:.3f}")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, body: Dict, queue_ms: float):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.send_header('X-Queue-Time-Ms', f"{queue_ms:.3f}")
+                self.end_headers()
+
+                completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+                time.sleep(server._delay(server.first_token_ms))
+                for i, token in enumerate(server.tokens()):
+                    if i:
+                        time.sleep(server._delay(server.token_ms))
+                    chunk = {
+                        'id': completion_id,
+                        'object': 'chat.completion.chunk',
+                        'model': body.get('model', 'stub'),
+                        'choices': [{'index': 0, 'delta': {'content': token}, 'finish_reason': None}]
+                    }
+                    self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+                self._write_chunk("data: [DONE]\n\n")
+                self._write_chunk('')
+
+            def _write_chunk(self, text: str):
+                data = text.encode('utf-8')
+                self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+    def tokens(self):
+        """The canned completion, one whitespace-delimited token at a time"""
+        return [f"token{i} " for i in range(self.completion_tokens)]
+
+    def completion(self, body: Dict) -> Dict:
+        """A non-streaming chat.completion payload for ``body``"""
+        prompt_tokens = sum(len(str(m.get('content', '')).split()) for m in body.get('messages', []))
+        return {
+            'id': f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            'object': 'chat.completion',
+            'model': body.get('model', 'stub'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': ''.join(self.tokens()).strip()},
+                'finish_reason': 'stop'
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': self.completion_tokens,
+                'total_tokens': prompt_tokens + self.completion_tokens
+            }
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stub chat completion server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--first-token-ms', type=float, default=200.0)
+    parser.add_argument('--token-ms', type=float, default=5.0)
+    parser.add_argument('--completion-tokens', type=int, default=60)
+    parser.add_argument('--max-concurrency', type=int, default=0)
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    server = StubLLMServer(args.host, args.port, args.first_token_ms, args.token_ms,
+                           args.completion_tokens, max_concurrency=args.max_concurrency,
+                           fail_rate=args.fail_rate, seed=args.seed)
+    print(f"Stub LLM listening on {server.url}", flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Unit tests for the headless retrieval API and its micro-batcher
+"""
+
+import http.client
+import json
+import threading
+import time
+
+import numpy as np
+import pytest
+from prometheus_client import REGISTRY
+from src.rag.api_server import CoalescingEncoder, MicroBatcher, RetrievalService, make_server
+from src.rag.dense_index import DenseIndex
+from src.rag.hashing_embedder import HashingEmbedder
+from src.rag.indexes import KeywordIndex
+
+DOCUMENTS = [
+    {'id': 'skill_1', 'type': 'skill', 'title': 'Data Analytics', 'category': 'Technical',
+     'content': 'Data Analytics: analyse data sets with statistics and python', 'metadata': {'sector': 'ICT'}},
+    {'id': 'skill_2', 'type': 'skill', 'title': 'Financial Modelling', 'category': 'Technical',
+     'content': 'Financial Modelling: build spreadsheet models for forecasting', 'metadata': {'sector': 'Finance'}},
+    {'id': 'skill_3', 'type': 'skill', 'title': 'Stakeholder Management', 'category': 'Critical Core',
+     'content': 'Stakeholder Management: manage relationships and communication', 'metadata': {'sector': 'All'}},
+]
+
+
+def make_service(**kwargs):
+    embedder = HashingEmbedder(dimension=64)
+    keyword_index = KeywordIndex()
+    keyword_index.upsert(DOCUMENTS)
+    dense_index = DenseIndex([doc['id'] for doc in DOCUMENTS],
+                             embedder.encode([doc['content'] for doc in DOCUMENTS]))
+    return RetrievalService(embedder, dense_index, keyword_index,
+                            {doc['id']: doc for doc in DOCUMENTS}, **kwargs)
+
+
+class TestMicroBatcher:
+    def test_coalesces_requests_queued_behind_a_batch(self):
+        sizes = []
+
+        def batch_fn(items):
+            sizes.append(len(items))
+            time.sleep(0.05)
+            return [item * 2 for item in items]
+
+        batcher = MicroBatcher(batch_fn, max_batch_size=8, max_wait_ms=20)
+        futures = [batcher.submit(i) for i in range(6)]
+        assert [future.result(timeout=5) for future in futures] == [0, 2, 4, 6, 8, 10]
+        batcher.close()
+
+        assert sum(sizes) == 6
+        assert len(sizes) < 6
+        assert batcher.mean_batch_size > 1
+
+    def test_lone_request_is_not_delayed(self):
+        batcher = MicroBatcher(lambda items: items, max_wait_ms=1000)
+        start = time.perf_counter()
+        assert batcher('query') == 'query'
+        assert time.perf_counter() - start < 0.5
+        batcher.close()
+
+    def test_errors_reach_every_caller_in_the_batch(self):
+        def batch_fn(items):
+            raise RuntimeError("encoder failed")
+
+        batcher = MicroBatcher(batch_fn)
+        with pytest.raises(RuntimeError, match="encoder failed"):
+            batcher(1)
+        batcher.close()
+
+    def test_returned_exception_fails_only_its_caller(self):
+        batcher = MicroBatcher(lambda items: [ValueError(item) if item < 0 else item for item in items])
+        futures = [batcher.submit(i) for i in (1, -1, 2)]
+        assert futures[0].result(timeout=5) == 1 and futures[2].result(timeout=5) == 2
+        with pytest.raises(ValueError):
+            futures[1].result(timeout=5)
+        batcher.close()
+
+    def test_coalescing_encoder_matches_model(self):
+        model = HashingEmbedder(dimension=32)
+        encoder = CoalescingEncoder(model)
+        np.testing.assert_allclose(encoder.encode('data analytics'),
+                                   model.encode(['data analytics'])[0])
+        assert encoder.encode(['a', 'b']).shape == (2, 32)
+        encoder.batcher.close()
+
+
+class TestRetrievalService:
+    def test_batched_and_unbatched_results_match(self):
+        batched, unbatched = make_service(), make_service(max_batch_size=1)
+        for mode in ('hybrid', 'semantic', 'keyword'):
+            assert batched.search('data analytics', 2, mode) == unbatched.search('data analytics', 2, mode)
+        assert batched.search('data analytics', 1)[0]['title'] == 'Data Analytics'
+        batched.close()
+
+    def test_rejects_unknown_mode(self):
+        service = make_service(max_batch_size=1)
+        with pytest.raises(ValueError):
+            service.search('data', mode='fuzzy')
+        with pytest.raises(ValueError):
+            service.search('data', top_k=-1)
+
+    def test_bad_request_does_not_fail_its_batch(self):
+        service = make_service(max_batch_size=1)
+        for mode in ('hybrid', 'keyword'):
+            results = service._search_batch([('data analytics', 2, mode), (123, 2, mode), ('stakeholder', 2, mode)])
+            assert isinstance(results[1], Exception)
+            assert results[0][0][0]['id'] == 'skill_1' and results[2][0][0]['id'] == 'skill_3'
+
+    def test_reports_stage_timings_per_request(self):
+        for max_batch_size in (1, 8):
+            service = make_service(max_batch_size=max_batch_size)
+            stages = {}
+            service.search('data analytics', 2, stages=stages)
+            assert set(stages) == {'embedding', 'semantic_search', 'keyword_search', 'fusion'}
+            stages = {}
+            service.search('data analytics', 2, mode='keyword', stages=stages)
+            assert set(stages) == {'keyword_search'}
+            service.close()
+
+
+class TestHTTPAPI:
+    def setup_method(self):
+        class StubRAGService:
+            def process_user_query(self, query):
+                return {'response': f"About {query}", 'sources': []}
+
+        self.service = make_service(rag_service=StubRAGService())
+        self.server = make_server(self.service, port=0)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.connection = http.client.HTTPConnection('127.0.0.1', self.server.server_address[1], timeout=10)
+
+    def teardown_method(self):
+        self.connection.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.service.close()
+
+    def post(self, path, body):
+        self.connection.request('POST', path, json.dumps(body).encode('utf-8'),
+                                {'Content-Type': 'application/json'})
+        response = self.connection.getresponse()
+        return response.status, json.loads(response.read())
+
+    def test_search_over_one_keep_alive_connection(self):
+        status, payload = self.post('/search', {'query': 'financial modelling', 'top_k': 2})
+        assert status == 200
+        assert payload['results'][0]['id'] == 'skill_2'
+
+        # Second request reuses the same socket
+        status, payload = self.post('/search', {'query': 'stakeholder', 'mode': 'keyword'})
+        assert status == 200
+        assert [result['id'] for result in payload['results']] == ['skill_3']
+
+    def test_answer_and_unconfigured_retrieve(self):
+        assert self.post('/answer', {'query': 'data'}) == (200, {'response': 'About data', 'sources': []})
+        status, payload = self.post('/retrieve', {'query': 'data'})
+        assert status == 503
+
+    def test_requests_are_traced(self):
+        def count():
+            return REGISTRY.get_sample_value('rag_request_seconds_count') or 0
+
+        before = count()
+        self.post('/search', {'query': 'data'})
+        self.post('/search', {'query': 123})
+        assert count() == before + 2
+
+    def test_untraced_server_skips_tracing(self):
+        server = make_server(self.service, port=0, trace_requests=False)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=10)
+        before = REGISTRY.get_sample_value('rag_request_seconds_count') or 0
+        try:
+            connection.request('POST', '/search', b'{"query": "data"}')
+            response = connection.getresponse()
+            assert response.status == 200 and json.loads(response.read())['results']
+        finally:
+            connection.close()
+            server.shutdown()
+            server.server_close()
+        assert (REGISTRY.get_sample_value('rag_request_seconds_count') or 0) == before
+
+    def test_bad_requests(self):
+        assert self.post('/search', {'top_k': 3})[0] == 400
+        assert self.post('/search', {'query': 'data', 'mode': 'fuzzy'})[0] == 400
+        assert self.post('/unknown', {'query': 'data'})[0] == 404
+        assert self.post('/search', {'query': 123})[0] == 400
+        assert self.post('/search', {'query': 'data', 'top_k': -1})[0] == 400
+        assert self.post('/search', {'query': 'data', 'top_k': '3'})[0] == 400
+        assert self.post('/search', [1, 2])[0] == 400
+
+    def test_negative_content_length(self):
+        self.connection.request('POST', '/search', b'{"query": "data"}', {'Content-Length': '-1'})
+        response = self.connection.getresponse()
+        assert response.status == 400
+        response.read()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,136 @@
+"""
+Unit tests for conversation state and follow-up retrieval reuse
+"""
+
+import threading
+
+import pytest
+from src.rag.conversation import ConversationalRetriever
+from src.rag.conversation_state import ConversationState
+from src.rag.dense_index import DenseIndex
+from src.rag.hashing_embedder import HashingEmbedder
+from src.rag.indexes import KeywordIndex
+
+TOPICS = {
+    'data': 'data analytics statistics python dashboards visualisation',
+    'finance': 'financial modelling forecasting valuation spreadsheets',
+    'security': 'cloud security architecture threat modelling encryption',
+    'culinary': 'culinary arts kitchen food preparation menu planning',
+}
+
+
+def make_documents():
+    documents = []
+    for topic, text in TOPICS.items():
+        for level in range(1, 7):
+            documents.append({
+                'id': f"{topic}_{level}",
+                'title': f"{topic.title()} level {level}",
+                'type': 'skill',
+                'content': f"{text} proficiency level {level} skills jobs learning progression"
+            })
+    return documents
+
+
+class TestConversationState:
+    def test_compacts_old_turns_into_summary(self):
+        state = ConversationState(max_messages=4, max_summary_lines=2)
+        for i in range(5):
+            state.add_message('user', f"question {i}")
+            state.add_message('assistant', f"answer {i}")
+
+        assert [m['content'] for m in state.messages] == ['question 3', 'answer 3', 'question 4', 'answer 4']
+        assert state.summary == ['question 1', 'question 2']
+        assert state.compacted == 6
+        assert state.history()[0]['role'] == 'system'
+
+    def test_only_recent_answers_keep_full_sources(self):
+        state = ConversationState(full_source_messages=1)
+        source = {'title': 'Data Analytics', 'type': 'skill', 'content': 'long text', 'metadata': {}}
+        state.add_message('assistant', 'first', sources=[source])
+        state.add_message('assistant', 'second', sources=[source])
+
+        assert state.messages[0]['sources'] == [{'title': 'Data Analytics', 'type': 'skill'}]
+        assert state.messages[1]['sources'] == [source]
+
+
+class TestConversationalRetriever:
+    def setup_method(self):
+        documents = make_documents()
+        self.embedder = HashingEmbedder(dimension=128)
+        vectors = self.embedder.encode([doc['content'] for doc in documents])
+        keyword_index = KeywordIndex()
+        keyword_index.upsert(documents)
+        self.retriever = ConversationalRetriever(
+            self.embedder, DenseIndex([doc['id'] for doc in documents], vectors), keyword_index,
+            candidate_pool=8
+        )
+        self.state = ConversationState()
+
+    def test_follow_up_chip_reuses_candidates(self):
+        first = self.retriever.retrieve('financial modelling', self.state, top_k=3)
+        follow_up = self.retriever.retrieve('Which jobs require these skills?', self.state, top_k=3)
+
+        assert not first['reused'] and first['reason'] == 'first_turn'
+        assert follow_up['reused'] and follow_up['reason'] == 'rescored'
+        assert all(result['id'].startswith('finance') for result in follow_up['results'])
+        assert self.state.reused_turns == 1
+
+    def test_new_question_runs_full_search(self):
+        self.retriever.retrieve('financial modelling', self.state)
+        result = self.retriever.retrieve('culinary arts', self.state, top_k=3)
+
+        assert not result['reused'] and result['reason'] == 'new_question'
+        assert result['results'][0]['id'].startswith('culinary')
+        assert self.state.anchor_query == 'culinary arts'
+
+    def test_follow_up_with_uncovered_terms_searches_with_the_earlier_topic(self):
+        self.retriever.retrieve('financial modelling', self.state)
+        result = self.retriever.retrieve('which of these need kitchen experience?', self.state)
+
+        assert result['reason'] == 'new_terms'
+        assert self.state.anchor_query == 'financial modelling'
+
+    def test_low_confidence_falls_back(self):
+        self.retriever.min_confidence = 2.0
+        self.retriever.retrieve('financial modelling', self.state)
+        result = self.retriever.retrieve('Where can I learn these skills?', self.state)
+
+        assert result['reason'] == 'low_confidence'
+
+    def test_repeated_fallbacks_keep_the_original_topic(self):
+        self.retriever.min_confidence = 2.0
+        first = self.retriever.retrieve('financial modelling', self.state)
+        anchor_vector = self.state.anchor_vector
+        for _ in range(4):
+            result = self.retriever.retrieve('Where can I learn these skills?', self.state)
+            assert result['reason'] == 'low_confidence'
+
+        assert self.state.anchor_query == 'financial modelling'
+        assert self.state.anchor_vector is anchor_vector
+        assert result['results'][0]['id'] == first['results'][0]['id']
+
+    def test_embedding_cache_is_shared_safely_across_sessions(self):
+        self.retriever.embedding_cache_size = 4
+        queries = [f"skill {i}" for i in range(16)]
+        errors = []
+
+        def session(offset):
+            state = ConversationState()
+            try:
+                for i in range(200):
+                    self.retriever.retrieve(queries[(offset + i) % len(queries)], state, top_k=2)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=session, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors
+        assert len(self.retriever._embeddings) <= 4
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
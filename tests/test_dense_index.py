@@ -0,0 +1,80 @@
+"""
+Unit tests for dense indexes and the hashing embedder
+"""
+
+import pytest
+import numpy as np
+from src.rag.dense_index import DenseIndex, QuantizedDenseIndex, recall_at_k
+from src.rag.fusion import reciprocal_rank_fusion
+from src.rag.hashing_embedder import HashingEmbedder
+
+
+class TestHashingEmbedder:
+    def test_embeddings_are_deterministic_and_normalised(self):
+        text = "Cloud architect needs AWS skills"
+        first = HashingEmbedder().encode(text)
+        second = HashingEmbedder().encode([text])[0]
+
+        assert first.shape == (384,)
+        assert np.array_equal(first, second)
+        assert np.linalg.norm(first) == pytest.approx(1.0)
+
+    def test_similar_texts_score_higher(self):
+        embedder = HashingEmbedder()
+        query, near, far = embedder.encode([
+            "data analytics skills", "skills in data analytics", "pastry baking techniques"
+        ])
+        assert query @ near > query @ far
+
+    def test_feature_cache_is_bounded(self):
+        embedder = HashingEmbedder(cache_size=16)
+        cached = HashingEmbedder().encode("query number 1 about skills 2")
+        embedder.encode([f"query number {i} about skills {i + 1}" for i in range(100)])
+
+        assert embedder._bucket.cache_info().currsize == 16
+        assert np.array_equal(embedder.encode("query number 1 about skills 2"), cached)
+
+
+class TestDenseIndex:
+    def setup_method(self):
+        rng = np.random.default_rng(0)
+        self.ids = [f"doc{i}" for i in range(500)]
+        self.vectors = rng.normal(size=(500, 32)).astype(np.float32)
+        self.queries = rng.normal(size=(20, 32)).astype(np.float32)
+
+    def test_exact_search_finds_itself(self):
+        index = DenseIndex(self.ids, self.vectors)
+        results = index.search(self.vectors[42], top_k=3)
+
+        assert results[0]['id'] == 'doc42'
+        assert results[0]['score'] == pytest.approx(1.0, abs=1e-5)
+        assert results[0]['score'] >= results[1]['score'] >= results[2]['score']
+
+    def test_int8_recall_against_exact(self):
+        exact = DenseIndex(self.ids, self.vectors).search_batch(self.queries, 20)
+        int8 = QuantizedDenseIndex(self.ids, self.vectors, chunk_size=64)
+        reranked = QuantizedDenseIndex(self.ids, self.vectors, rerank=4)
+
+        assert int8.nbytes < DenseIndex(self.ids, self.vectors).nbytes
+        assert recall_at_k(int8.search_batch(self.queries, 10), exact, 10) >= 0.9
+        assert recall_at_k(reranked.search_batch(self.queries, 10), exact, 10) == 1.0
+
+    def test_recall_counts_ties_as_hits(self):
+        exact = [[{'id': 'a', 'score': 0.9}, {'id': 'b', 'score': 0.5}, {'id': 'c', 'score': 0.5}]]
+        approximate = [[{'id': 'a', 'score': 0.9}, {'id': 'c', 'score': 0.5}]]
+
+        assert recall_at_k(approximate, exact, 2) == 1.0
+
+
+class TestFusion:
+    def test_documents_in_both_lists_rank_first(self):
+        semantic = [{'id': 'a', 'score': 0.9}, {'id': 'b', 'score': 0.8}]
+        keyword = [{'id': 'b', 'score': 12.0}, {'id': 'c', 'score': 3.0}]
+
+        fused = reciprocal_rank_fusion([semantic, keyword], [0.7, 0.3], top_k=3)
+
+        assert [r['id'] for r in fused] == ['b', 'a', 'c']
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,73 @@
+"""
+Unit tests for the column-backed document store
+"""
+
+import pytest
+from src.rag.document_store import DocumentStore, memory_report
+
+
+def make_document(doc_id, sector='ICT', content='data analytics and dashboards', **extra):
+    return {
+        'id': doc_id,
+        'type': 'skill',
+        'title': f"Skill {doc_id}",
+        'category': 'Technical',
+        'content': content,
+        'metadata': {'sector': sector, 'proficiency': 3, 'source': 'skills_framework'},
+        **extra
+    }
+
+
+class TestDocumentStore:
+    def test_round_trips_documents(self):
+        documents = [make_document('a'), make_document('b', sector='Finance', content='valuation 估值')]
+        store = DocumentStore(documents)
+
+        assert len(store) == 2
+        assert list(store) == ['a', 'b']
+        assert store['b'] == documents[1]
+        assert store.get('missing') is None
+        assert store.content('b') == 'valuation 估值'
+        assert store.field('a', 'metadata.sector') == 'ICT'
+
+    def test_repeated_values_are_stored_once(self):
+        store = DocumentStore(make_document(str(i)) for i in range(100))
+
+        # 100 titles plus the shared type, category, sector, proficiency and source
+        assert len(store._values) - 1 == 105
+
+    def test_equal_values_of_different_types_stay_distinct(self):
+        documents = [make_document('a', score=1), make_document('b', core=True, score=1.0)]
+        store = DocumentStore(documents)
+
+        assert store['b'] == documents[1]
+        assert type(store['b']['score']) is float and store['b']['core'] is True
+
+    def test_fields_missing_from_some_documents(self):
+        store = DocumentStore([make_document('a'), make_document('b', tags=['x', 'y'])])
+
+        assert 'tags' not in store['a']
+        assert store['b']['tags'] == ['x', 'y']
+        assert store.field('a', 'tags', 'none') == 'none'
+
+    def test_upsert_and_discard(self):
+        store = DocumentStore([make_document('a'), make_document('b')])
+        store.add(make_document('a', content='updated'))
+        store.discard('b')
+
+        assert len(store) == 1
+        assert store.content('a') == 'updated'
+        compacted = store.compact()
+        assert len(compacted._ids) == 1
+        assert compacted['a'] == store['a']
+
+    def test_memory_report_shows_savings(self):
+        documents = [make_document(str(i), content=f"skill description {i} " * 10) for i in range(500)]
+        report = memory_report(documents)
+
+        assert report['documents'] == 500
+        assert report['store_bytes_per_document'] < report['dict_bytes_per_document']
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,86 @@
+"""
+Unit tests for the CPU embedding engine
+"""
+
+import pytest
+import numpy as np
+from src.rag.embedding_engine import (
+    CPUEmbeddingEngine,
+    embedding_agreement,
+    length_bucketed_batches,
+    padding_ratio
+)
+
+
+def fake_encoder_factory(**kwargs):
+    def encode(texts):
+        return np.array([[len(text), text.count('a'), 1.0] for text in texts])
+    return encode
+
+
+TEXTS = ['a' * n + 'b' for n in (5, 50, 1, 20, 3, 40, 7, 9, 30)]
+
+
+class TestCPUEmbeddingEngine:
+    def test_vectors_come_back_in_input_order(self):
+        engine = CPUEmbeddingEngine(batch_size=2, num_workers=1,
+                                    encoder_factory=fake_encoder_factory)
+        vectors = engine.encode(TEXTS)
+
+        assert vectors.shape == (len(TEXTS), 3)
+        assert list(vectors[:, 0]) == [len(text) for text in TEXTS]
+        assert engine.last_stats['batches'] == 5
+
+    def test_process_pool_matches_in_process(self):
+        expected = CPUEmbeddingEngine(batch_size=2, num_workers=1,
+                                      encoder_factory=fake_encoder_factory).encode(TEXTS)
+        engine = CPUEmbeddingEngine(batch_size=2, num_workers=2,
+                                    encoder_factory=fake_encoder_factory)
+        try:
+            vectors = engine.encode(TEXTS)
+        finally:
+            engine.close()
+
+        assert np.array_equal(vectors, expected)
+        assert embedding_agreement(vectors, expected)['min_cosine'] == pytest.approx(1.0)
+
+    def test_workers_never_load_a_model_in_the_parent(self):
+        engine = CPUEmbeddingEngine(batch_size=32, num_workers=2,
+                                    encoder_factory=fake_encoder_factory)
+        try:
+            vectors = engine.encode(TEXTS[:3])
+            assert engine._pool._mp_context.get_start_method() == 'spawn'
+        finally:
+            engine.close()
+
+        assert engine.last_stats['batches'] == 1
+        assert engine._local_encoder is None
+        assert list(vectors[:, 0]) == [len(text) for text in TEXTS[:3]]
+
+    def test_length_buckets_reduce_padding(self):
+        arrival_order = [list(range(i, min(i + 3, len(TEXTS)))) for i in range(0, len(TEXTS), 3)]
+        bucketed = length_bucketed_batches(TEXTS, 3)
+
+        assert sorted(i for batch in bucketed for i in batch) == list(range(len(TEXTS)))
+        assert padding_ratio(TEXTS, bucketed) < padding_ratio(TEXTS, arrival_order)
+
+    def test_generate_embeddings_keys_by_document_id(self):
+        engine = CPUEmbeddingEngine(num_workers=1, encoder_factory=fake_encoder_factory)
+        embeddings = engine.generate_embeddings([
+            {'id': '1', 'content': 'aaa'},
+            {'id': '2', 'content': 'b'}
+        ])
+
+        assert embeddings['1'][0] == 3
+        assert embeddings['2'][0] == 1
+
+    def test_from_config_keyword_arguments_override_the_config(self):
+        engine = CPUEmbeddingEngine.from_config({'batch_size': 8, 'num_workers': 4}, num_workers=1,
+                                                encoder_factory=fake_encoder_factory)
+
+        assert engine.batch_size == 8 and engine.num_workers == 1
+        assert engine.encode(['aa'])[0][0] == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
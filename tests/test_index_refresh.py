@@ -0,0 +1,145 @@
+"""
+Unit tests for incremental index refresh
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from src.rag.indexes import KeywordIndex, MetadataIndex
+from src.rag.index_refresh import IncrementalIndexRefresher
+
+COLUMNS = ['TSC_CCS Type', 'TSC_CCS Code', 'Sector', 'TSC_CCS Category', 'TSC_CCS Title',
+           'TSC_CCS Description', 'Proficiency Level', 'Proficiency Description',
+           'Knowledge / Ability Classification', 'Knowledge / Ability Items']
+
+
+def make_row(code, level, item, title='Data Analytics'):
+    return ['tsc', code, 'Infocomm', 'Data', title, 'Analyse data', level,
+            'Apply analytics', 'knowledge', item]
+
+
+def write_drop(path, rows):
+    pd.DataFrame(rows, columns=COLUMNS).to_csv(path / 'jobsandskills-TSC_CCS_K_A_8.csv', index=False)
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = {}
+        self.upserted = 0
+
+    def upsert(self, ids, embeddings, metadatas, documents):
+        self.upserted += len(ids)
+        self.docs.update(zip(ids, documents))
+
+    def delete(self, ids):
+        for doc_id in ids:
+            del self.docs[doc_id]
+
+
+class FakeVectorStore:
+    def __init__(self):
+        self.collection = FakeCollection()
+        self.client = self
+
+    def get_collection(self, name):
+        return self.collection
+
+
+class FakeEmbeddingGenerator:
+    def __init__(self):
+        self.embedded = 0
+
+    def generate_embeddings(self, documents):
+        self.embedded += len(documents)
+        return {doc['id']: np.zeros(4) for doc in documents}
+
+
+class TestIncrementalIndexRefresher:
+    def setup_method(self):
+        self.vector_store = FakeVectorStore()
+        self.embedding_gen = FakeEmbeddingGenerator()
+        self.keyword_index = KeywordIndex()
+        self.metadata_index = MetadataIndex()
+
+    def make_refresher(self, tmp_path):
+        return IncrementalIndexRefresher(
+            self.vector_store,
+            self.embedding_gen,
+            keyword_index=self.keyword_index,
+            metadata_index=self.metadata_index,
+            manifest_path=str(tmp_path / 'index' / 'manifest.json')
+        )
+
+    def test_refresh_applies_only_the_diff(self, tmp_path):
+        write_drop(tmp_path, [
+            make_row('ICT-DAT-1', '3', 'Statistical methods'),
+            make_row('ICT-DAT-1', '3', 'Data visualisation tools'),
+            make_row('ICT-DAT-1', '4', 'Predictive modelling')
+        ])
+        report = self.make_refresher(tmp_path).refresh(str(tmp_path))
+        assert (report['inserted'], report['updated'], report['deleted']) == (3, 0, 0)
+
+        write_drop(tmp_path, [
+            make_row('ICT-DAT-1', '3', 'Statistical methods'),
+            make_row('ICT-DAT-1', '3', 'Data visualisation tools', title='Data Visualisation'),
+            make_row('ICT-DAT-1', '5', 'Machine learning pipelines')
+        ])
+        report = self.make_refresher(tmp_path).refresh(str(tmp_path))
+
+        assert (report['inserted'], report['updated'], report['deleted']) == (1, 1, 1)
+        assert report['unchanged'] == 1
+        assert self.embedding_gen.embedded == 5
+        assert len(self.vector_store.collection.docs) == 3
+        assert len(self.keyword_index) == 3
+        assert [r['id'] for r in self.keyword_index.search('predictive')] == []
+        assert self.keyword_index.search('pipelines')
+
+    def test_unchanged_drop_is_a_no_op(self, tmp_path):
+        write_drop(tmp_path, [make_row('ICT-DAT-1', '3', 'Statistical methods')])
+        self.make_refresher(tmp_path).refresh(str(tmp_path))
+
+        report = self.make_refresher(tmp_path).refresh(str(tmp_path))
+
+        assert report['unchanged'] == 1
+        assert report['changed_fraction'] == 0
+        assert self.vector_store.collection.upserted == 1
+
+    def test_duplicate_keys_map_to_distinct_documents(self, tmp_path):
+        write_drop(tmp_path, [
+            make_row('ICT-DAT-1', '3', 'Statistical methods'),
+            make_row('ICT-DAT-1', '3', 'Statistical methods')
+        ])
+        report = self.make_refresher(tmp_path).refresh(str(tmp_path), dry_run=True)
+
+        assert report['inserted'] == 2
+        assert self.embedding_gen.embedded == 0
+
+
+class TestKeywordIndex:
+    def test_tombstones_are_hidden_then_compacted(self):
+        index = KeywordIndex()
+        index.upsert([
+            {'id': 'a', 'content': 'cloud security architecture'},
+            {'id': 'b', 'content': 'cloud cost management'}
+        ])
+        index.delete(['a'])
+
+        assert [r['id'] for r in index.search('cloud')] == ['b']
+        assert 'security' in index.postings
+
+        index.compact()
+        assert 'security' not in index.postings
+        assert len(index) == 1
+
+    def test_writes_invalidate_cached_term_weights(self):
+        index = KeywordIndex()
+        index.upsert([{'id': 'a', 'content': 'cloud security'}])
+        assert [r['id'] for r in index.search('cloud')] == ['a']
+
+        index.upsert([{'id': 'b', 'content': 'cloud cloud cloud'}])
+        assert [r['id'] for r in index.search('cloud')] == ['b', 'a']
+        assert index.search('missing') == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,148 @@
+"""
+Unit tests for the pooled LLM client, run against the local stub server
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from prometheus_client import REGISTRY
+from src.rag.llm_client import LLMClient, LLMError, RetryBudget
+from src.rag.stub_llm import StubLLMServer
+
+MESSAGES = [{'role': 'user', 'content': 'Which skills does a data analyst need?'}]
+
+
+def run_concurrently(target, count):
+    results = []
+    threads = [threading.Thread(target=lambda i=i: results.append(target(i))) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestRetryBudget:
+    def test_retries_are_earned_by_calls(self):
+        budget = RetryBudget(ratio=0.5, reserve=1)
+        assert budget.withdraw()
+        assert not budget.withdraw()
+
+        budget.deposit()
+        budget.deposit()
+        assert budget.withdraw()
+
+
+class TestLLMClient:
+    def test_reuses_one_connection_and_reports_usage(self):
+        with StubLLMServer(first_token_ms=0, token_ms=0, completion_tokens=4) as stub:
+            client = LLMClient(stub.url, api_key='test')
+            results = [client.chat(MESSAGES) for _ in range(3)]
+
+        assert results[0]['content'] == 'token0 token1 token2 token3'
+        assert results[0]['usage']['completion_tokens'] == 4
+        assert not results[0]['usage_estimated']
+        assert stub.stats['connections'] == 1
+        assert client.stats['completion_tokens'] == 12
+
+    def test_streaming_measures_first_token(self):
+        with StubLLMServer(first_token_ms=50, token_ms=1, completion_tokens=5) as stub:
+            client = LLMClient(stub.url)
+            result = client.chat(MESSAGES, stream=True)
+            client.chat(MESSAGES, stream=True)
+
+        assert result['content'].split() == [f"token{i}" for i in range(5)]
+        assert result['time_to_first_token'] >= 0.04
+        assert result['usage']['completion_tokens'] == 5
+        assert result['usage_estimated']
+        assert stub.stats['connections'] == 1
+
+    def test_identical_in_flight_prompts_share_one_call(self):
+        with StubLLMServer(first_token_ms=300, token_ms=0) as stub:
+            client = LLMClient(stub.url)
+            results = run_concurrently(lambda i: client.chat(MESSAGES), 5)
+
+        assert stub.stats['requests'] == 1
+        assert sum(result['shared'] for result in results) == 4
+        assert client.stats['upstream_calls'] == 1
+        # Only the leader's result bills tokens
+        assert sum(result['usage']['completion_tokens'] for result in results) == client.stats['completion_tokens']
+
+    def test_records_llm_stage_latencies(self):
+        def count(stage):
+            return REGISTRY.get_sample_value('rag_stage_seconds_count', {'stage': stage}) or 0
+
+        before = count('llm_time_to_first_token'), count('llm_total')
+        with StubLLMServer(first_token_ms=0, token_ms=0) as stub:
+            LLMClient(stub.url).chat(MESSAGES)
+
+        assert (count('llm_time_to_first_token'), count('llm_total')) == (before[0] + 1, before[1] + 1)
+
+    def test_malformed_response_closes_the_connection(self):
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers['Content-Length']))
+                self.send_response(200)
+                self.send_header('Content-Length', '2')
+                self.end_headers()
+                self.wfile.write(b'{}')
+
+            def log_message(self, *args):
+                pass
+
+        server = HTTPServer(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            client = LLMClient(f"http://127.0.0.1:{server.server_address[1]}/v1")
+            with pytest.raises(LLMError, match="Malformed") as error:
+                client.chat(MESSAGES)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert error.value.status == 200 and not error.value.retryable
+        assert client.pool._idle == []
+
+    def test_concurrency_cap(self):
+        with StubLLMServer(first_token_ms=100, token_ms=0) as stub:
+            client = LLMClient(stub.url, max_concurrency=2)
+            results = run_concurrently(
+                lambda i: client.chat([{'role': 'user', 'content': f"question {i}"}]), 6
+            )
+
+        assert stub.stats['max_in_flight'] == 2
+        assert stub.stats['connections'] <= 2
+        assert max(result['queue_seconds'] for result in results) >= 0.08
+
+    def test_retry_budget_stops_retry_storms(self):
+        with StubLLMServer(first_token_ms=0, token_ms=0, fail_rate=1.0) as stub:
+            client = LLMClient(stub.url, retry_budget=RetryBudget(ratio=0.1, reserve=1),
+                               backoff_seconds=0)
+            with pytest.raises(LLMError) as first:
+                client.chat(MESSAGES)
+            with pytest.raises(LLMError):
+                client.chat([{'role': 'user', 'content': 'another question'}])
+
+        assert first.value.status == 503
+        # The reserve pays for one retry; every later retry is denied
+        assert stub.stats['requests'] == 3
+        assert client.stats['retries'] == 1
+        assert client.stats['retries_denied'] == 2
+
+    def test_from_config(self):
+        config = {'model': 'gpt-4o-mini', 'temperature': 0.2, 'base_url': 'http://localhost:9/v1',
+                  'client': {'max_concurrency': 3, 'retry': {'max_attempts': 5}}}
+        client = LLMClient.from_config(config, api_key='key')
+
+        assert client.model == 'gpt-4o-mini'
+        assert client.default_params == {'temperature': 0.2}
+        assert client.max_attempts == 5
+        assert client.pool.path == '/v1'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,62 @@
+"""
+Unit tests for pipeline metrics
+"""
+
+import urllib.request
+
+import pytest
+import structlog
+from prometheus_client import CollectorRegistry
+from src.rag.metrics import PipelineMetrics
+
+
+class TestPipelineMetrics:
+    def setup_method(self):
+        self.metrics = PipelineMetrics(CollectorRegistry())
+
+    def sample(self, name, **labels):
+        return self.metrics.registry.get_sample_value(name, labels)
+
+    def test_stage_timer_fills_fixed_buckets(self):
+        with self.metrics.stage('semantic_search'):
+            pass
+        self.metrics.observe('llm_time_to_first_token', 0.3)
+
+        assert self.sample('rag_stage_seconds_count', stage='semantic_search') == 1
+        assert self.sample('rag_stage_seconds_bucket', stage='llm_time_to_first_token', le='0.25') == 0
+        assert self.sample('rag_stage_seconds_bucket', stage='llm_time_to_first_token', le='0.5') == 1
+
+    def test_cache_hit_ratio(self):
+        for hit in (True, True, False, True):
+            self.metrics.record_cache('query_embedding', hit)
+
+        assert self.sample('rag_cache_hit_ratio', cache='query_embedding') == 0.75
+        assert self.sample('rag_cache_requests_total', cache='query_embedding', result='miss') == 1
+
+    def test_request_trace_logs_stage_timings(self):
+        with structlog.testing.capture_logs() as logs:
+            with self.metrics.trace(request_id='abc', intent='skill_inquiry') as trace:
+                with trace.stage('keyword_search'):
+                    pass
+                trace.observe('llm_total', 0.5)
+
+        assert logs[0]['event'] == 'rag_request'
+        assert logs[0]['request_id'] == 'abc'
+        assert logs[0]['stages_ms']['llm_total'] == 500.0
+        assert 'keyword_search' in logs[0]['stages_ms']
+        assert self.sample('rag_request_seconds_count') == 1
+
+    def test_serves_prometheus_exposition(self):
+        self.metrics.set_index_size('keyword', 42)
+        server, _ = self.metrics.serve(port=0)
+        port = server.server_address[1]
+        try:
+            body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics").read().decode()
+        finally:
+            server.shutdown()
+
+        assert 'rag_index_documents{index="keyword"} 42.0' in body
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -7,13 +7,14 @@ import numpy as np
 from src.rag import (
     QueryProcessor, 
     QueryIntent,
-    DocumentCreator,
-    EmbeddingGenerator
+    DocumentCreator
 )
+from src.rag.hashing_embedder import HashingEmbedder
 
 class TestQueryProcessor:
     def setup_method(self):
-        self.embedding_gen = EmbeddingGenerator()
+        # Deterministic stand-in so the suite runs offline
+        self.embedding_gen = HashingEmbedder()
         self.processor = QueryProcessor(self.embedding_gen)
     
     def test_intent_classification(self):
@@ -63,6 +64,9 @@ class TestDocumentCreator:
 
 class TestEmbeddingGenerator:
     def setup_method(self):
+        # Downloads the real model; skipped when sentence-transformers is absent
+        pytest.importorskip("sentence_transformers")
+        from src.rag import EmbeddingGenerator
         self.generator = EmbeddingGenerator()
     
     def test_embedding_generation(self):
@@ -0,0 +1,96 @@
+"""
+Unit tests for the CSV schema profiler and the schema-driven loader
+"""
+
+import pytest
+import pandas as pd
+from src.rag.index_refresh import iter_source_rows
+from src.rag.schema_profiler import (load_schema, profile_directory, profile_file,
+                                     read_csv_kwargs, write_schema)
+
+
+def write_csv(path, rows=40):
+    pd.DataFrame({
+        'TSC Code': [f"ICT-DAT-{i:04d}-1.1" for i in range(rows)],
+        'Sector': ['Infocomm' if i % 2 else 'Finance' for i in range(rows)],
+        'Proficiency Level': [str(i % 6 + 1) for i in range(rows)],
+        'Score': ['' if i % 4 == 0 else f"{i / 3:.2f}" for i in range(rows)],
+        'Items': [f"Item number {i}, with a comma" for i in range(rows)],
+    }).to_csv(path, index=False)
+
+
+class TestSchemaProfiler:
+    def test_infers_dtypes_nulls_and_categories(self, tmp_path):
+        write_csv(tmp_path / 'jobsandskills-a.csv')
+        columns = profile_file(str(tmp_path / 'jobsandskills-a.csv'), chunk_rows=7)['columns']
+
+        assert columns['Proficiency Level']['dtype'] == 'int64'
+        assert columns['Score']['dtype'] == 'float64'
+        assert columns['Score']['null_rate'] == 0.25
+        assert columns['Sector']['categorical'] and columns['Sector']['distinct'] == 2
+        assert not columns['TSC Code']['categorical'] and columns['TSC Code']['distinct'] == 40
+        assert columns['Items']['length']['min'] == len("Item number 0, with a comma")
+
+    def test_falls_back_to_latin_1(self, tmp_path):
+        (tmp_path / 'jobsandskills-b.csv').write_bytes('Sector,Title\nCaf\xe9,Chef\n'.encode('latin-1'))
+        profile = profile_file(str(tmp_path / 'jobsandskills-b.csv'))
+
+        assert profile['encoding'] == 'latin-1'
+        assert profile['columns']['Sector']['samples'] == ['Caf\xe9']
+
+    def test_samples_large_files(self, tmp_path):
+        write_csv(tmp_path / 'jobsandskills-a.csv', rows=100)
+        profile = profile_file(str(tmp_path / 'jobsandskills-a.csv'), chunk_rows=10,
+                               sample_rows=20, sample_every=4)
+
+        assert profile['rows'] == 100
+        assert profile['sampled'] and profile['profiled_rows'] == 40
+
+    def test_arrow_reader_matches_pandas(self, tmp_path):
+        pytest.importorskip('pyarrow')
+        write_csv(tmp_path / 'jobsandskills-a.csv', rows=100)
+        path = str(tmp_path / 'jobsandskills-a.csv')
+        arrow = profile_file(path, engine='arrow', chunk_rows=10)
+        pandas = profile_file(path, engine='pandas', chunk_rows=10)
+
+        assert arrow['engine'] == 'arrow' and arrow['rows'] == 100
+        assert arrow['columns'] == pandas['columns']
+
+
+class TestSchemaLoading:
+    def test_loader_reads_with_schema_dtypes(self, tmp_path):
+        write_csv(tmp_path / 'jobsandskills-a.csv')
+        before = list(iter_source_rows(str(tmp_path)))
+        write_schema(profile_directory(str(tmp_path)), str(tmp_path / 'schema.json'))
+        schema = load_schema(str(tmp_path))
+
+        kwargs = read_csv_kwargs(schema, str(tmp_path / 'jobsandskills-a.csv'), strings_only=True)
+        assert kwargs['dtype']['Sector'] == 'category'
+        assert kwargs['dtype']['Proficiency Level'] is str
+        assert list(iter_source_rows(str(tmp_path))) == before
+
+    def test_sampled_numeric_columns_load_as_strings(self, tmp_path):
+        write_csv(tmp_path / 'jobsandskills-a.csv', rows=100)
+        frame = pd.read_csv(tmp_path / 'jobsandskills-a.csv', dtype=str, keep_default_na=False)
+        frame.loc[95, 'Proficiency Level'] = 'N/A'  # in a chunk the sample skips
+        frame.to_csv(tmp_path / 'jobsandskills-a.csv', index=False)
+        path = str(tmp_path / 'jobsandskills-a.csv')
+        profile = profile_file(path, chunk_rows=10, sample_rows=20, sample_every=4)
+        schema = {'files': {'jobsandskills-a.csv': profile}}
+
+        assert profile['columns']['Proficiency Level']['dtype'] == 'int64'
+        kwargs = read_csv_kwargs(schema, path)
+        assert kwargs['dtype']['Proficiency Level'] is str
+        # An int64 dtype would make this read raise
+        assert pd.read_csv(path, **kwargs)['Proficiency Level'].isna().sum() == 1
+
+    def test_changed_files_ignore_stale_schema(self, tmp_path):
+        write_csv(tmp_path / 'jobsandskills-a.csv')
+        schema = profile_directory(str(tmp_path))
+        write_csv(tmp_path / 'jobsandskills-a.csv', rows=50)
+
+        assert read_csv_kwargs(schema, str(tmp_path / 'jobsandskills-a.csv'))['dtype'] is str
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
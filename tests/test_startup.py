@@ -0,0 +1,71 @@
+"""
+Unit tests for lazy package loading and cold-start instrumentation
+"""
+
+import logging
+import os
+import subprocess
+import sys
+
+import pytest
+from src.rag.startup import ModelPreloader, StartupProfiler
+
+
+class TestLazyPackage:
+    def test_importing_package_does_not_load_submodules(self):
+        code = (
+            "import sys, src.rag\n"
+            "assert 'src.rag.indexes' not in sys.modules\n"
+            "assert 'numpy' not in sys.modules\n"
+            "src.rag.KeywordIndex\n"
+            "assert 'src.rag.indexes' in sys.modules\n"
+        )
+        repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        subprocess.run([sys.executable, '-c', code], check=True, cwd=repo_root)
+
+    def test_unknown_attribute_raises(self):
+        import src.rag
+        with pytest.raises(AttributeError):
+            src.rag.DoesNotExist
+
+
+class TestStartupProfiler:
+    def test_stages_accumulate(self):
+        profiler = StartupProfiler()
+        for _ in range(2):
+            with profiler.stage('load model'):
+                pass
+
+        timings = profiler.report()['timings']
+        assert list(timings) == ['load model']
+        assert timings['load model'] >= 0
+
+    def test_report_is_logged_once_per_event(self, caplog):
+        profiler = StartupProfiler()
+        with caplog.at_level(logging.INFO, logger='src.rag.startup'):
+            for event in ('first render', 'first render', 'model loaded'):
+                profiler.log_report_once(event)
+
+        reports = [record.getMessage() for record in caplog.records if 'Startup report' in record.getMessage()]
+        assert len(reports) == 2
+        assert '(first render)' in reports[0] and '(model loaded)' in reports[1]
+
+
+class TestModelPreloader:
+    def test_returns_loaded_model(self):
+        preloader = ModelPreloader(lambda name: {'model': name}, 'all-MiniLM-L6-v2')
+        assert preloader.result(timeout=5) == {'model': 'all-MiniLM-L6-v2'}
+        assert preloader.ready
+
+    def test_reraises_load_errors(self):
+        def failing_loader():
+            raise ImportError("sentence_transformers not installed")
+
+        preloader = ModelPreloader(failing_loader)
+        with pytest.raises(ImportError):
+            preloader.result(timeout=5)
+        assert not preloader.ready
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,57 @@
+"""
+Unit tests for the stub chat completion server
+"""
+
+import json
+import threading
+import urllib.request
+
+import pytest
+from src.rag.stub_llm import StubLLMServer
+
+
+def post(url, body):
+    request = urllib.request.Request(f"{url}/chat/completions", data=json.dumps(body).encode(),
+                                     headers={'Content-Type': 'application/json'})
+    return urllib.request.urlopen(request, timeout=10)
+
+
+class TestStubLLMServer:
+    def test_completion_reports_usage(self):
+        with StubLLMServer(first_token_ms=0, token_ms=0, completion_tokens=5) as stub:
+            with post(stub.url, {'messages': [{'role': 'user', 'content': 'three word prompt'}]}) as response:
+                payload = json.loads(response.read())
+
+        assert payload['choices'][0]['message']['content'].startswith('token0')
+        assert payload['usage'] == {'prompt_tokens': 3, 'completion_tokens': 5, 'total_tokens': 8}
+
+    def test_streams_server_sent_events(self):
+        with StubLLMServer(first_token_ms=0, token_ms=0, completion_tokens=3) as stub:
+            with post(stub.url, {'messages': [], 'stream': True}) as response:
+                events = [line for line in response if line.startswith(b'data: ')]
+
+        assert len(events) == 4
+        assert events[-1].strip() == b'data: [DONE]'
+
+    def test_concurrency_limit_queues_requests(self):
+        with StubLLMServer(first_token_ms=100, token_ms=0, max_concurrency=1) as stub:
+            queue_times = []
+
+            def call():
+                with post(stub.url, {'messages': []}) as response:
+                    queue_times.append(float(response.headers['X-Queue-Time-Ms']))
+
+            threads = [threading.Thread(target=call) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            stats = json.loads(urllib.request.urlopen(f"{stub.url}/stats").read())
+
+        assert stats['max_in_flight'] == 1
+        assert stats['requests'] == 3
+        assert max(queue_times) >= 150
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])